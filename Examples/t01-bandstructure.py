@@ -1,4 +1,3 @@
-from pymatgen import Structure
 from abitools import AbinitTask
 
 # Initialize the Launcher.
@@ -8,7 +7,7 @@ calc = AbinitTask('01-Bandstructure')
 calc.set_comment('A band structure calculation')
 
 # Structure
-calc.set_structure(Structure.from_file('Data/Structures/Si.json'))
+calc.set_structure('Data/Structures/Si.json')
 
 # Pseudopotentials
 calc.pseudo_dir = 'Data/Pseudos/'
@@ -1,8 +1,8 @@
-from pymatgen import Structure
 from abitools import AbinitTask
+from abitools.io import AbinitInput
 
 # == Common Inputs == #
-structure = Structure.from_file('Data/Structures/Si.json')
+structure = 'Data/Structures/Si.json'
 
 basis_set = {
     'ecut' : 15.,
@@ -54,6 +54,15 @@ options = {
 
 # ================================================ #
 
+# Common variables are set once and shared by all calculations
+template = AbinitInput()
+template.set_structure(structure)
+template.set_variables(basis_set)
+template.set_variables(options)
+template.set_variables(gstate)
+template.set_variables(kpoints)
+template.freeze()
+
 # K-points grids for convergence study
 kpt_grids = [
     [2,2,2],
@@ -66,7 +75,7 @@ calcs = list()
 
 for icalc, kpt_grid in enumerate(kpt_grids):
 
-    calc = AbinitTask('02-Kptconv-{}'.format(icalc+1))
+    calc = AbinitTask('02-Kptconv-{}'.format(icalc+1), input_template=template)
 
     # Number of processors
     calc.nproc = 4
@@ -78,13 +87,6 @@ for icalc, kpt_grid in enumerate(kpt_grids):
     # Link the input of dataset 2 to the output of dataset 1 for the '_DEN' file
     calc.link_io(2, 1, 'DEN')
     
-    # Set common variables
-    calc.set_structure(structure)
-    calc.set_variables(basis_set)
-    calc.set_variables(options)
-    calc.set_variables(gstate)
-    calc.set_variables(kpoints)
-    
     # Set varying variables
     calc.set_variables({'ngkpt' : kpt_grid})
 
@@ -1,8 +1,58 @@
+"""
+The subpackages and the classes of abitools are imported on first use,
+so that small scripts only pay for the modules they need.
+"""
+import sys
+import importlib
 
-from . import config
-from . import utils
-from . import core
-from . import io
+_submodules = ('config', 'utils', 'core', 'io', 'tasks')
 
-from .core import *
-from .tasks import *
+# Objects exported by the package, and the subpackage defining them.
+_exports = {
+    'core': [
+        'Writable', 'BasicFile', 'BasicInputFile', 'WriteSummary',
+        'write_if_changed', 'Task', 'MPITask', 'IOTask', 'Workflow',
+        'RunScript', 'StatusCache', 'get_fingerprint', 'CalculationCache',
+        'TaskExecutor', 'TaskGraph', 'scan_status', 'ResultsStore',
+        'add_sink', 'remove_sink', 'recording', 'instrumented',
+        'JSONLinesSink', 'AggregateSink', 'LoggingSink',
+        'CostModel', 'get_task_features', 'PackedScript', 'read_exit_status',
+        'ArrayScript',
+        ],
+    'tasks': [
+        'AbinitTask', 'MrgddbTask', 'MrgddbInput', 'MrgdvTask', 'MrgdvInput',
+        'AnaddbTask', 'MrgGkkTask', 'MrgGkkFlow',
+        ],
+    }
+
+_origins = dict((name, module) for module, names in _exports.items()
+                for name in names)
+
+__all__ = sorted(_origins)
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module('.' + name, __name__)
+    if name in _origins:
+        module = importlib.import_module('.' + _origins[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(
+        "module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules) | set(_origins))
+
+
+# Module-level __getattr__ is only supported from Python 3.7.
+if sys.version_info < (3, 7):
+    from . import config
+    from . import utils
+    from . import core
+    from . import io
+
+    from .core import *
+    from .tasks import *
@@ -1,5 +1,66 @@
-from .writable import *
-from .task import *
-from .workflow import *
-from .runscript import *
+"""
+The modules of abitools.core are imported on first use,
+so that importing a task does not import the workflow machinery.
+"""
+import sys
+import importlib
 
+# Objects exported by the package, and the module defining them.
+_exports = {
+    'writable': ['Writable', 'BasicFile', 'BasicInputFile', 'WriteSummary',
+                 'write_if_changed'],
+    'task': ['Task', 'MPITask', 'IOTask'],
+    'workflow': ['Workflow'],
+    'runscript': ['RunScript'],
+    'statuscache': ['StatusCache', 'get_fingerprint'],
+    'calccache': ['CalculationCache'],
+    'instrumentation': ['add_sink', 'remove_sink', 'recording', 'instrumented',
+                        'JSONLinesSink', 'AggregateSink', 'LoggingSink'],
+    'executor': ['TaskExecutor'],
+    'dependencies': ['TaskGraph'],
+    'statusscan': ['scan_status'],
+    'results': ['ResultsStore'],
+    'costmodel': ['CostModel', 'get_task_features'],
+    'packing': ['PackedScript', 'read_exit_status'],
+    'jobarray': ['ArrayScript'],
+    }
+
+_origins = dict((name, module) for module, names in _exports.items()
+                for name in names)
+
+__all__ = sorted(_origins)
+
+
+def __getattr__(name):
+    if name in _origins:
+        module = importlib.import_module('.' + _origins[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    if name in _exports or name == 'asyncrunner':
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError(
+        "module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_origins))
+
+
+# Module-level __getattr__ is only supported from Python 3.7.
+if sys.version_info < (3, 7):
+    from .writable import *
+    from .task import *
+    from .workflow import *
+    from .runscript import *
+    from .statuscache import *
+    from .calccache import *
+    from .instrumentation import *
+
+    from .executor import *
+    from .dependencies import *
+    from .statusscan import *
+    from .results import *
+    from .costmodel import *
+    from .packing import *
+    from .jobarray import *
@@ -0,0 +1,222 @@
+from __future__ import print_function
+import os
+import signal
+import asyncio
+
+# Public
+__all__ = ['arun_script', 'arun_task', 'arun_tasks']
+
+# Seconds between SIGTERM and SIGKILL when terminating a script.
+_KILL_DELAY = 5.
+
+
+async def _terminate(process):
+    """Terminate the process group of a script, then wait for it."""
+    if process.returncode is not None:
+        return
+
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except OSError:
+            break
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), _KILL_DELAY)
+            break
+        except asyncio.TimeoutError:
+            continue
+
+
+async def arun_script(runscript, cwd=None, timeout=None):
+    """
+    Execute a RunScript and return its exit code.
+
+    The script runs in its own process group, which is terminated
+    if the timeout expires or if the coroutine is cancelled.
+
+    Arguments
+    ---------
+
+    runscript : RunScript
+        The script to be executed.
+
+    Keyword arguments
+    -----------------
+
+    cwd : str (None)
+        Directory from which the script is executed.
+    timeout : float (None)
+        Wall-clock time limit, in seconds.
+        asyncio.TimeoutError is raised when it expires.
+
+    """
+    process = await asyncio.create_subprocess_exec(
+        'bash', runscript.fname, cwd=cwd, start_new_session=True)
+
+    try:
+        return await asyncio.wait_for(process.wait(), timeout)
+    except BaseException:
+        await asyncio.shield(_terminate(process))
+        raise
+
+
+async def _poll_status(task, poll_interval, on_status, **kwargs):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(poll_interval)
+        status = await loop.run_in_executor(
+            None, lambda: task.get_status(**kwargs))
+        on_status(task, status)
+
+
+async def arun_task(task, timeout=None, poll_interval=None, on_status=None,
+                    **kwargs):
+    """
+    Execute a task and return its status.
+
+    Arguments
+    ---------
+
+    task : Task
+        The task to be executed.
+
+    Keyword arguments
+    -----------------
+
+    timeout : float (None)
+        Wall-clock time limit, in seconds. When it expires, the execution
+        is terminated and the status of the task is returned.
+    poll_interval : float (None)
+        Interval, in seconds, between calls to task.get_status
+        while the task is running.
+    on_status : function (None)
+        Function called as on_status(task, status) after each polling.
+
+    Any other keyword argument is passed to task.get_status.
+    If the task has a calculation cache, the outputs of an identical
+    calculation are restored instead of executing the task.
+    """
+    loop = asyncio.get_running_loop()
+
+    key = await loop.run_in_executor(None, task.get_cache_key)
+    if key is not None:
+        restored = await loop.run_in_executor(
+            None, task.restore_from_cache, key)
+        if restored:
+            return await loop.run_in_executor(
+                None, lambda: task.get_status(**kwargs))
+
+    poller = None
+    if poll_interval and on_status is not None:
+        poller = asyncio.ensure_future(
+            _poll_status(task, poll_interval, on_status, **kwargs))
+
+    try:
+        await arun_script(task.runscript, cwd=task.dirname, timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        if poller is not None:
+            poller.cancel()
+
+    status = await loop.run_in_executor(
+        None, lambda: task.get_status(**kwargs))
+
+    if key is not None and status == task._STATUS_COMPLETED:
+        await loop.run_in_executor(None, task.store_in_cache, key)
+        task.calculation_cache.flush()
+
+    return status
+
+
+async def arun_tasks(tasks, max_concurrency=None, graph=None, callback=None,
+                     cost=None, **kwargs):
+    """
+    Execute tasks concurrently, and return when they are done.
+
+    Arguments
+    ---------
+
+    tasks : list
+        The tasks to be executed.
+
+    Keyword arguments
+    -----------------
+
+    max_concurrency : int (None)
+        Maximum number of tasks running at the same time.
+        Default is no limit.
+    graph : TaskGraph (None)
+        Dependencies between the tasks. A task is started only once
+        all the tasks it depends on have completed, and is skipped
+        if any of them fails to complete. Tasks that do not belong
+        to the list of tasks are considered as completed.
+    callback : function (None)
+        Function called with each task as argument, as soon as it finishes
+        or is skipped.
+    cost : function (None)
+        Function returning the expected duration of a task.
+        The longest tasks, or the longest chains of dependent tasks,
+        are started first. If None, the tasks are started in order.
+
+    Any other keyword argument is passed to arun_task.
+    If a task raises an exception, the other tasks are cancelled
+    and their executions terminated before the exception is raised.
+    """
+    tasks = list(tasks)
+    if cost is not None:
+        if graph is not None:
+            priorities = graph.get_path_lengths(cost)
+        else:
+            priorities = dict((task, cost(task)) for task in tasks)
+        tasks.sort(key=lambda task: priorities.get(task, 0), reverse=True)
+    done = dict((task, asyncio.Event()) for task in tasks)
+    failed = set()
+
+    if max_concurrency:
+        semaphore = asyncio.Semaphore(max_concurrency)
+    else:
+        semaphore = None
+
+    async def run_one(task):
+        try:
+            parents = graph.get_parents(task) if graph is not None else []
+            for parent in parents:
+                if parent in done:
+                    await done[parent].wait()
+
+            if any(parent in failed for parent in parents):
+                failed.add(task)
+
+            else:
+                if semaphore is not None:
+                    async with semaphore:
+                        status = await arun_task(task, **kwargs)
+                else:
+                    status = await arun_task(task, **kwargs)
+
+                if status in (task._STATUS_UNSTARTED,
+                              task._STATUS_UNFINISHED):
+                    failed.add(task)
+
+        except BaseException:
+            failed.add(task)
+            raise
+
+        finally:
+            done[task].set()
+
+        if callback is not None:
+            callback(task)
+
+    # On the first error, or if this coroutine is cancelled, the other
+    # tasks are cancelled, which terminates their running executions.
+    futures = [asyncio.ensure_future(run_one(task)) for task in tasks]
+    try:
+        await asyncio.gather(*futures)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        await asyncio.shield(
+            asyncio.gather(*futures, return_exceptions=True))
+        raise
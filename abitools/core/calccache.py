@@ -0,0 +1,126 @@
+from __future__ import print_function
+import os
+import shutil
+import hashlib
+
+from ..utils import mkdir_p, JSONLinesIndex
+from .statuscache import get_fingerprint
+
+# Public
+__all__ = ['CalculationCache']
+
+
+class CalculationCache(JSONLinesIndex):
+    """
+    Content-addressed cache of completed calculations.
+
+    A task is identified by a hash of its content, as given by
+    Task.get_content_string and Task.get_content_files, e.g. the rendered
+    input, the pseudopotentials and the linked input data files.
+    Each hash is mapped to the directory of a completed task,
+    and to the list of its output files.
+
+    When a task with the same hash is executed, its outputs are restored
+    from the completed task instead, by copying them, so that a later
+    execution of either task never modifies the files of the other.
+
+    File hashes are cached along with the fingerprint (size, mtime, inode)
+    of the files, so that large data files are only hashed once.
+    Entries are stored in a JSON-lines index file, in which the last entry
+    for a given key prevails. See JSONLinesIndex.
+    """
+
+    _BLOCKSIZE = 1 << 20
+
+    def __init__(self, fname):
+        """
+        Arguments
+        ---------
+
+        fname : str
+            Name of the index file. Created at the first flush if needed.
+
+        """
+        super(CalculationCache, self).__init__(fname)
+
+    def _get_entry_key(self, entry):
+        if 'key' in entry:
+            return ('key', entry['key'])
+        return ('file', entry['file'])
+
+    def hash_file(self, fname):
+        """
+        Return the sha1 hash of the content of a file.
+        The hash is taken from the cache if the file did not change.
+        """
+        fname = os.path.realpath(fname)
+        fingerprint = get_fingerprint(os.stat(fname))
+
+        entry = self._get_entry(('file', fname))
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            return entry['sha1']
+
+        sha = hashlib.sha1()
+        with open(fname, 'rb') as f:
+            for block in iter(lambda: f.read(self._BLOCKSIZE), b''):
+                sha.update(block)
+
+        entry = dict(file=fname, fingerprint=fingerprint,
+                     sha1=sha.hexdigest())
+        self._add_entry(entry)
+        return entry['sha1']
+
+    def get_key(self, task):
+        """
+        Return the content hash of a task, or None if it cannot be
+        computed, e.g. because an input data file does not exist yet.
+        """
+        content = task.get_content_string()
+        if content is None:
+            return None
+
+        sha = hashlib.sha1(content.encode('utf-8'))
+        for label, fname in task.get_content_files():
+            try:
+                file_hash = self.hash_file(fname)
+            except (OSError, IOError):
+                return None
+            sha.update('\n{} {}'.format(label, file_hash).encode('utf-8'))
+
+        return sha.hexdigest()
+
+    def lookup(self, key):
+        """
+        Return the entry of a completed calculation, or None if there is none
+        or if its output files no longer exist.
+        """
+        entry = self._get_entry(('key', key))
+        if entry is None:
+            return None
+
+        for path in entry['outputs']:
+            if not os.path.exists(os.path.join(entry['dirname'], path)):
+                return None
+
+        return entry
+
+    def add(self, key, task):
+        """Record a completed task under a key."""
+        outputs = [path for path in task.get_output_paths()
+                   if os.path.exists(os.path.join(task.dirname, path))]
+        entry = dict(key=key, dirname=os.path.realpath(task.dirname),
+                     outputs=outputs)
+        self._add_entry(entry)
+
+    def restore(self, entry, task):
+        """Populate the directory of a task with the outputs of an entry."""
+        if os.path.realpath(task.dirname) == entry['dirname']:
+            return
+
+        for path in entry['outputs']:
+            source = os.path.join(entry['dirname'], path)
+            dest = os.path.join(task.dirname, path)
+            mkdir_p(os.path.dirname(dest))
+            if os.path.lexists(dest):
+                os.remove(dest)
+            shutil.copyfile(source, dest)
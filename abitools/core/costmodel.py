@@ -0,0 +1,222 @@
+from __future__ import print_function, division
+import os
+import math
+
+from ..utils import lazy_import, JSONLinesIndex
+
+np = lazy_import('numpy')
+
+# Public
+__all__ = ['CostModel', 'get_task_features']
+
+# Features of a task that determine its cost.
+_FEATURES = ('ecut', 'nkpt', 'nband', 'natom', 'nproc')
+
+# Power law of the cost used before any run is recorded,
+# and toward which the fitted exponents are regularized.
+_PRIOR_EXPONENTS = dict(ecut=1.5, nkpt=1., nband=2., natom=1., nproc=-1.)
+
+_DATASET_CHARS = '0123456789:+?'
+
+
+def _product(values):
+    result = 1
+    for value in values:
+        result *= value
+    return result
+
+
+def _get_nkpt(variables):
+    """Number of k-points, or of points in the k-point grid."""
+    if 'nkpt' in variables:
+        return variables['nkpt']
+    nshiftk = variables.get('nshiftk', 1)
+    if 'ngkpt' in variables:
+        return _product(variables['ngkpt']) * nshiftk
+    if 'kptrlatt' in variables:
+        return abs(np.linalg.det(np.array(variables['kptrlatt'], dtype=float))
+                   ) * nshiftk
+    return None
+
+
+def get_task_features(task):
+    """
+    Return the features determining the cost of a task, in a dict:
+    ecut, nkpt, nband, natom and nproc. The values are taken from
+    the input variables of the task, and from its number of processors.
+    For inputs with several datasets, the largest value is used.
+    Features that cannot be determined are omitted.
+    """
+    features = dict()
+
+    inp = getattr(task, 'input', None)
+    datasets = dict()
+    for name, value in getattr(inp, 'variables', dict()).items():
+        basename = name.rstrip(_DATASET_CHARS)
+        suffix = name[len(basename):]
+        datasets.setdefault(suffix, dict())[basename] = value
+
+    # The variables without dataset index apply to every dataset.
+    common = datasets.pop('', dict())
+    for variables in list(datasets.values()) or [dict()]:
+        merged = dict(common)
+        merged.update(variables)
+        values = dict(
+            ecut=merged.get('ecut'),
+            nkpt=_get_nkpt(merged),
+            nband=merged.get('nband'),
+            natom=merged.get('natom'),
+            )
+        for name, value in values.items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            if value > 0:
+                features[name] = max(value, features.get(name, 0))
+
+    nproc = getattr(task, 'nproc', None)
+    if nproc:
+        features['nproc'] = float(nproc)
+
+    return features
+
+
+class CostModel(JSONLinesIndex):
+    """
+    Predictor of the wall time of tasks, learned from past runs.
+
+    The wall time is modeled as a power law of the features of the task
+    (see get_task_features), fitted by least squares on the logarithms.
+    The exponents are regularized toward a prior power law,
+    so that the model is usable from the first few runs.
+    Only the features known for some of the recorded runs are used,
+    and a missing feature takes its mean value over these runs.
+    Without recorded runs, the prior power law gives the relative costs.
+
+    The runs are recorded in a JSON-lines file, one run per line,
+    in which the last entry for a given task prevails.
+    See JSONLinesIndex.
+
+    Example usage:
+
+    >> model = CostModel('costs.json')
+    >> model.add_tasks(previous_workflow)
+    >> model.flush()
+    >> sorted(workflow, key=model.predict, reverse=True)
+    """
+
+    def __init__(self, fname=None, regularization=1.):
+        """
+        Keyword arguments
+        -----------------
+
+        fname : str (None)
+            Name of the file in which the runs are recorded.
+            If None, the runs are only kept in memory.
+        regularization : float (1.)
+            Weight of the prior exponents in the fit.
+
+        """
+        self.regularization = regularization
+        self._coefficients = None
+        self._means = None
+        super(CostModel, self).__init__(fname)
+
+    def _get_entry_key(self, entry):
+        float(entry['wall_time'])
+        return entry['key']
+
+    def load(self):
+        """Read the recorded runs."""
+        super(CostModel, self).load()
+        self._coefficients = None
+
+    def add_sample(self, key, features, wall_time):
+        """
+        Record the wall time (sec) of a run with the given features.
+        A new sample with the same key replaces the previous one.
+        """
+        self._add_entry(dict(key=key, features=features, wall_time=wall_time))
+        self._coefficients = None
+
+    def add_task(self, task):
+        """
+        Record the wall time of a task that completed, as given by
+        task.get_timing(). Returns False if it is not available.
+        """
+        try:
+            wall_time = task.get_timing().get('wall_time')
+        except (IOError, OSError):
+            return False
+        if not wall_time or wall_time <= 0:
+            return False
+
+        self.add_sample(os.path.abspath(task.dirname),
+                        get_task_features(task), wall_time)
+        return True
+
+    def add_tasks(self, tasks):
+        """Record the wall time of every task that completed."""
+        return sum(self.add_task(task) for task in tasks)
+
+    def _get_row(self, features):
+        """Constant term and logarithm of the features used by the fit."""
+        row = [1.]
+        for name, mean in self._means:
+            value = features.get(name)
+            row.append(math.log(value) if value else mean)
+        return row
+
+    def fit(self):
+        """
+        Fit the model on the recorded runs. Done automatically
+        by predict when new runs were recorded.
+        """
+        with self._lock:
+            samples = list(self._entries.values())
+
+        if not samples:
+            self._means = [(name, 0.) for name in _FEATURES]
+            self._coefficients = np.array(
+                [0.] + [_PRIOR_EXPONENTS[name] for name in _FEATURES])
+            return
+
+        means = list()
+        for name in _FEATURES:
+            values = [math.log(s['features'][name]) for s in samples
+                      if s['features'].get(name)]
+            if values:
+                means.append((name, sum(values) / len(values)))
+        self._means = means
+
+        prior = np.array([0.] + [_PRIOR_EXPONENTS[name] for name, mean in means])
+        X = np.array([self._get_row(s['features']) for s in samples])
+        y = np.log([s['wall_time'] for s in samples])
+
+        # Ridge regression toward the prior exponents.
+        # The constant term is not regularized.
+        penalty = self.regularization * np.eye(len(prior))
+        penalty[0, 0] = 0.
+        A = X.T.dot(X) + penalty
+        b = X.T.dot(y) + penalty.dot(prior)
+        self._coefficients = np.linalg.lstsq(A, b, rcond=-1)[0]
+
+    def predict_features(self, features):
+        """Return the predicted wall time (sec) of a run."""
+        if self._coefficients is None:
+            self.fit()
+        return float(np.exp(np.dot(self._coefficients,
+                                   self._get_row(features))))
+
+    def predict(self, task):
+        """
+        Return the predicted wall time (sec) of a task.
+        Without recorded runs, only the relative costs are meaningful.
+        """
+        return self.predict_features(get_task_features(task))
+
+    def clear(self):
+        """Remove all runs and the file."""
+        super(CostModel, self).clear()
+        self._coefficients = None
@@ -0,0 +1,119 @@
+from __future__ import print_function
+import os
+from collections import OrderedDict
+
+# Public
+__all__ = ['TaskGraph']
+
+
+class TaskGraph(object):
+    """
+    Dependency graph of a list of tasks.
+
+    A task depends on another task if it links or copies a file
+    that lies in the directory of the other task, as returned by
+    Task.get_input_paths. When several tasks share a directory,
+    a task only depends on the tasks of that directory that precede it.
+    """
+
+    def __init__(self, tasks):
+        """
+        Arguments
+        ---------
+
+        tasks : list
+            The tasks, in their order of execution.
+
+        """
+        self.tasks = list(tasks)
+        self._parents = OrderedDict((task, list()) for task in self.tasks)
+        self._children = OrderedDict((task, list()) for task in self.tasks)
+        self._build()
+
+    @staticmethod
+    def _normdir(dirname):
+        return os.path.normpath(os.path.abspath(dirname))
+
+    def _build(self):
+
+        # Tasks sorted by directory
+        directories = dict()
+        for task in self.tasks:
+            dirname = self._normdir(task.dirname)
+            directories.setdefault(dirname, list()).append(task)
+
+        for i, task in enumerate(self.tasks):
+            for path in task.get_input_paths():
+
+                # Find the deepest task directory containing the file.
+                dirname = os.path.dirname(self._normdir(path))
+                while dirname not in directories:
+                    parent = os.path.dirname(dirname)
+                    if parent == dirname:
+                        break
+                    dirname = parent
+                else:
+                    for producer in directories[dirname]:
+                        if producer is task:
+                            break
+                        self.add_dependency(task, producer)
+
+    def add_dependency(self, task, parent):
+        """Declare that task depends on parent."""
+        if parent not in self._parents[task]:
+            self._parents[task].append(parent)
+            self._children[parent].append(task)
+
+    def get_parents(self, task):
+        """Return the tasks on which a task depends."""
+        return list(self._parents[task])
+
+    def get_children(self, task):
+        """Return the tasks that depend on a task."""
+        return list(self._children[task])
+
+    def topological_sort(self):
+        """
+        Return the tasks sorted such that every task comes after
+        the tasks it depends on, keeping the original order otherwise.
+        """
+        nparents = dict((task, len(parents))
+                        for task, parents in self._parents.items())
+
+        order = list()
+        ready = [task for task in self.tasks if not nparents[task]]
+        position = dict((task, i) for i, task in enumerate(self.tasks))
+
+        while ready:
+            task = ready.pop(0)
+            order.append(task)
+            for child in self._children[task]:
+                nparents[child] -= 1
+                if not nparents[child]:
+                    ready.append(child)
+            ready.sort(key=position.get)
+
+        if len(order) != len(self.tasks):
+            raise Exception('Circular dependency found among the tasks:\n' +
+                '\n'.join(task.dirname for task in self.tasks
+                          if nparents[task]))
+
+        return order
+
+    def get_path_lengths(self, cost):
+        """
+        Return the length of the longest chain of dependent tasks
+        starting from each task, in a dict. The length of a chain is
+        the sum of cost(task) over its tasks.
+        """
+        lengths = dict()
+        for task in reversed(self.topological_sort()):
+            children = [lengths[child] for child in self._children[task]]
+            lengths[task] = cost(task) + max(children or [0])
+        return lengths
+
+    def __iter__(self):
+        return iter(self.topological_sort())
+
+    def __len__(self):
+        return len(self.tasks)
@@ -0,0 +1,177 @@
+from __future__ import print_function
+import sys
+import threading
+
+try:
+    import queue
+except ImportError:  # Py2
+    import Queue as queue
+
+# Public
+__all__ = ['TaskExecutor']
+
+
+if sys.version_info[0] >= 3:
+    def _reraise(exc_type, exc_value, exc_traceback):
+        raise exc_value.with_traceback(exc_traceback)
+else:  # Py2
+    exec('def _reraise(exc_type, exc_value, exc_traceback):\n'
+         '    raise exc_type, exc_value, exc_traceback\n')
+
+
+class TaskExecutor(object):
+    """
+    Execute tasks concurrently within a budget of cores.
+
+    Each task is executed from its own thread, which waits on the
+    run script of the task. A task occupies as many cores as its
+    number of processors (nproc) for MPI tasks, or a single core otherwise.
+    Tasks are started in order, as soon as enough cores are free
+    and the tasks they depend on have completed.
+    A task that requests more cores than the budget is executed alone.
+
+    With a cost function, e.g. CostModel.predict, the longest tasks are
+    started first, which brings the total time close to the ideal one
+    when the tasks are of mixed sizes. With dependencies, the tasks are
+    ordered by the cost of the longest chain of tasks depending on them.
+    """
+
+    def __init__(self, ncores=None):
+        """
+        Keyword arguments
+        -----------------
+
+        ncores : int (None)
+            Total number of cores available to the tasks.
+            Default is the number of cores of the machine.
+
+        """
+        if not ncores:
+            import multiprocessing
+            ncores = multiprocessing.cpu_count()
+        self.ncores = int(ncores)
+
+    def get_task_ncores(self, task):
+        """Return the number of cores occupied by a task."""
+        nproc = getattr(task, 'nproc', 1) or 1
+        return max(1, min(int(nproc), self.ncores))
+
+    def _run_task(self, task, finished):
+        try:
+            status = task.run()
+        except Exception:
+            finished.put((task, None, sys.exc_info()))
+        else:
+            finished.put((task, status, None))
+
+    def _is_failed(self, task, status):
+        """True if dependent tasks should not be started."""
+        return status in (task._STATUS_UNSTARTED, task._STATUS_UNFINISHED)
+
+    def run(self, tasks, callback=None, graph=None, cost=None):
+        """
+        Run all tasks, and return when they are done.
+
+        Arguments
+        ---------
+
+        tasks : list
+            The tasks to be executed.
+
+        Keyword arguments
+        -----------------
+
+        callback : function (None)
+            Function called with each task as argument, as soon as it finishes.
+            The callback is always called from the calling thread.
+            It is also called for the tasks that are skipped
+            because a task they depend on did not complete,
+            and for the tasks whose execution raised an exception.
+            Once the running tasks are done, the first exception
+            is raised again, with its original traceback.
+        graph : TaskGraph (None)
+            Dependencies between the tasks. A task is started only once
+            all the tasks it depends on have completed. Tasks that do not
+            belong to the list of tasks are considered as completed.
+            If None, the tasks are assumed to be independent.
+        cost : function (None)
+            Function returning the expected duration of a task.
+            If None, the tasks are started in order.
+
+        """
+        pending = list(tasks)
+        if graph is not None:
+            scheduled = set(pending)
+            pending = [task for task in graph.topological_sort()
+                       if task in scheduled]
+
+        if cost is not None:
+            if graph is not None:
+                priorities = graph.get_path_lengths(cost)
+            else:
+                priorities = dict((task, cost(task)) for task in pending)
+            pending.sort(key=lambda task: priorities.get(task, 0),
+                         reverse=True)
+
+        finished = queue.Queue()
+        running = set()
+        failed = set()
+        free = self.ncores
+        error = None
+
+        while pending or running:
+
+            # Start every task that is ready and fits in the free cores
+            for task in list(pending):
+
+                if error is not None:
+                    break
+
+                if graph is not None:
+                    parents = graph.get_parents(task)
+
+                    if any(parent in failed for parent in parents):
+                        pending.remove(task)
+                        failed.add(task)
+                        if callback is not None:
+                            callback(task)
+                        continue
+
+                    if any(parent in running or parent in pending
+                           for parent in parents):
+                        continue
+
+                ncores = self.get_task_ncores(task)
+                if ncores > free:
+                    continue
+
+                pending.remove(task)
+                running.add(task)
+                free -= ncores
+                thread = threading.Thread(target=self._run_task,
+                                          args=(task, finished))
+                thread.daemon = True
+                thread.start()
+
+            if not running:
+                break
+
+            # Wait for any task to finish
+            task, status, exc_info = finished.get()
+            running.remove(task)
+            free += self.get_task_ncores(task)
+
+            if exc_info is not None:
+                # Stop starting new tasks, but wait for the running ones.
+                failed.add(task)
+                if error is None:
+                    error = exc_info
+
+            elif self._is_failed(task, status):
+                failed.add(task)
+
+            if callback is not None:
+                callback(task)
+
+        if error is not None:
+            _reraise(*error)
@@ -0,0 +1,235 @@
+from __future__ import print_function
+import os
+import json
+import time
+import functools
+import threading
+from collections import OrderedDict
+
+from .writable import WriteSummary
+
+__all__ = ['add_sink', 'remove_sink', 'recording', 'instrumented',
+           'JSONLinesSink', 'AggregateSink', 'LoggingSink']
+
+# Sinks receiving the events. Nothing is measured while it is empty.
+_sinks = list()
+
+_local = threading.local()
+
+try:
+    _clock = time.perf_counter
+except AttributeError:  # Py2
+    _clock = time.time
+
+
+def add_sink(sink):
+    """
+    Start sending the events to a sink, i.e. an object with an
+    emit(event) method. The events are dictionaries with keys
+
+        task : the directory of the task, or the name of the script
+        class : the class of the instrumented object
+        phase : 'write', 'run' or 'get_status' for a task,
+                'write_workflow' or 'run_workflow' for a workflow
+                as a whole, and 'runscript' for a script
+        start : time at which the phase started, in seconds since the epoch
+        duration : wall time of the phase, in seconds
+
+    and, depending on the phase,
+
+        files : number of files created or updated ('write', 'write_workflow')
+        bytes : number of bytes in these files ('write', 'write_workflow')
+        status : status of the task ('run', 'get_status', 'run_workflow')
+        returncode : exit code of the script ('runscript')
+        error : name of the exception raised, if any
+    """
+    if sink not in _sinks:
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    """Stop sending the events to a sink."""
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+class recording(object):
+    """
+    Context manager sending the events to a sink within a block, e.g.
+
+        >>> with recording(AggregateSink()) as stats:
+        >>>     workflow.write()
+        >>> print(stats)
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __enter__(self):
+        add_sink(self.sink)
+        return self.sink
+
+    def __exit__(self, *exc_info):
+        remove_sink(self.sink)
+
+
+def instrumented(phase):
+    """
+    Decorate a method so that each call emits an event for the given phase.
+    When a method calls an instrumented method of the same phase
+    on the same object, e.g. through super(), only the outermost call
+    is measured. Without sinks, the method is called directly.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(obj, *args, **kwargs):
+            if not _sinks:
+                return method(obj, *args, **kwargs)
+            return _measure(phase, method, obj, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def _measure(phase, method, obj, args, kwargs):
+    try:
+        active = _local.active
+    except AttributeError:
+        active = _local.active = set()
+
+    key = (id(obj), phase)
+    if key in active:
+        return method(obj, *args, **kwargs)
+
+    active.add(key)
+    start = time.time()
+    t0 = _clock()
+    try:
+        result = method(obj, *args, **kwargs)
+    except BaseException as e:
+        event = _make_event(obj, phase, start, _clock() - t0, kwargs)
+        event['error'] = type(e).__name__
+        _emit(event)
+        raise
+    finally:
+        active.discard(key)
+
+    event = _make_event(obj, phase, start, _clock() - t0, kwargs)
+    _add_result(event, result)
+    _emit(event)
+    return result
+
+
+def _make_event(obj, phase, start, duration, kwargs):
+    task = getattr(obj, 'dirname', None)
+    if task is None:
+        # A script is identified by its path.
+        task = os.path.join(kwargs.get('cwd') or '', getattr(obj, 'fname', ''))
+    return OrderedDict([
+        ('task', task),
+        ('class', type(obj).__name__),
+        ('phase', phase),
+        ('start', start),
+        ('duration', duration),
+        ])
+
+
+def _add_result(event, result):
+    if isinstance(result, WriteSummary):
+        changed = result.created + result.updated
+        event['files'] = len(changed)
+        event['bytes'] = sum(os.path.getsize(fname) for fname in changed
+                             if os.path.isfile(fname))
+    elif isinstance(result, int):
+        event['returncode'] = result
+    elif isinstance(result, str):
+        event['status'] = result
+
+
+def _emit(event):
+    for sink in list(_sinks):
+        sink.emit(event)
+
+
+class JSONLinesSink(object):
+    """Append the events to a file, one JSON object per line."""
+
+    def __init__(self, fname):
+        self.fname = fname
+        self._file = open(fname, 'a')
+        self._lock = threading.Lock()
+
+    def emit(self, event):
+        line = json.dumps(event) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class AggregateSink(object):
+    """
+    Accumulate the events in memory. The statistics are kept per phase,
+    and per class if by_class is True, in the stats attribute.
+    """
+
+    _fields = ('count', 'total', 'max', 'files', 'bytes')
+
+    def __init__(self, by_class=False):
+        self.by_class = by_class
+        self.stats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def emit(self, event):
+        key = event['phase']
+        if self.by_class:
+            key = (event['class'], key)
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = dict.fromkeys(self._fields, 0)
+            stats['count'] += 1
+            stats['total'] += event['duration']
+            stats['max'] = max(stats['max'], event['duration'])
+            stats['files'] += event.get('files', 0)
+            stats['bytes'] += event.get('bytes', 0)
+
+    def clear(self):
+        self.stats.clear()
+
+    def __str__(self):
+        lines = ['{:<30} {:>8} {:>10} {:>10} {:>8} {:>12}'.format(
+                 'phase', 'count', 'total [s]', 'max [s]', 'files', 'bytes')]
+        for key, stats in self.stats.items():
+            if isinstance(key, tuple):
+                key = '.'.join(key)
+            lines.append('{:<30} {count:>8} {total:>10.3f} {max:>10.3f} '
+                         '{files:>8} {bytes:>12}'.format(key, **stats))
+        return '\n'.join(lines)
+
+
+class LoggingSink(object):
+    """
+    Log the events with the logging module,
+    by default with the 'abitools' logger at the INFO level.
+    """
+
+    def __init__(self, logger='abitools', level=None):
+        import logging
+        if level is None:
+            level = logging.INFO
+        if not isinstance(logger, logging.Logger):
+            logger = logging.getLogger(logger)
+        self.logger = logger
+        self.level = level
+
+    def emit(self, event):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        details = ' '.join('{}={}'.format(key, event[key])
+                           for key in ('files', 'bytes', 'status',
+                                       'returncode', 'error')
+                           if key in event)
+        self.logger.log(self.level, '%s %s %.6fs %s', event['phase'],
+                        event['task'], event['duration'], details)
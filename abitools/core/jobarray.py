@@ -0,0 +1,212 @@
+from __future__ import print_function
+import os
+
+from .runscript import RunScript
+from .writable import write_if_changed
+
+# Public
+__all__ = ['ArrayScript']
+
+# Scheduler directive declaring the range of the array, and variable
+# holding the index of the array element, for a few batch schedulers.
+SLURM_ARRAY = ('#SBATCH --array={first}-{last}', 'SLURM_ARRAY_TASK_ID')
+PBS_ARRAY = ('#PBS -J {first}-{last}', 'PBS_ARRAY_INDEX')
+SGE_ARRAY = ('#$ -t {first1}-{last1}', 'SGE_TASK_ID')
+
+_EXECUTION = r"""
+line=$(sed -n "$((INDEX_VARIABLE - OFFSET + START + 1))p" "$INDEX_FILE")
+if [ -z "$line" ]; then
+    echo "No task for array index $INDEX_VARIABLE" >&2
+    exit 1
+fi
+IFS=$'\t' read -r dir script <<< "$line"
+cd "$dir" && bash "$script"
+"""
+
+
+class ArrayScript(RunScript):
+    """
+    Job-array submission script executing one task per array element.
+
+    The tasks are listed in a compact index file, one line per task
+    holding its directory and the name of its run script, separated
+    by a tab. The element of index i of the array executes the task
+    on line i+1 of the index file. A single submission, e.g.
+
+        $ sbatch array.sh
+
+    thus fans out all the tasks, each with the resources declared
+    in the header of the script, so that the tasks should be similar.
+    The script is submitted from the directory given to set_tasks.
+
+    Batch schedulers limit the size of an array (e.g. MaxArraySize for
+    Slurm). With max_size, split returns several scripts, each executing
+    a chunk of at most max_size consecutive lines of the index file.
+    """
+
+    def __init__(self, index_fname='tasks.index', scheduler=SLURM_ARRAY,
+                 max_size=None, *args, **kwargs):
+        """
+        Keyword arguments
+        -----------------
+
+        index_fname : str ('tasks.index')
+            Name of the index file, relative to the script directory.
+        scheduler : pair of str (SLURM_ARRAY)
+            Directive declaring the range of the array, formatted with
+            first and last (0-based indices), or first1 and last1
+            (1-based indices), and name of the variable holding the index.
+            See also PBS_ARRAY and SGE_ARRAY.
+        max_size : int (None)
+            Maximum number of elements of an array. Default is no limit.
+
+        Any other keyword argument is passed to RunScript,
+        e.g. header to request the resources of each task.
+
+        """
+        super(ArrayScript, self).__init__(*args, **kwargs)
+        self.index_fname = index_fname
+        self.array_directive, self.index_variable = scheduler
+        self.max_size = max_size
+        self.index = list()
+        self.start = 0
+        self.stop = None
+        self._directive = None
+
+    @property
+    def ntasks(self):
+        """Number of elements of the array."""
+        return len(self.index[self.start:self.stop])
+
+    @property
+    def offset(self):
+        """Index of the first element of the array."""
+        return 1 if '{first1}' in self.array_directive else 0
+
+    def set_tasks(self, dirname, tasks):
+        """
+        Set the tasks of the array, replacing the previous ones.
+
+        Arguments
+        ---------
+
+        dirname : str
+            Directory from which the script is submitted.
+        tasks : list
+            The tasks to be executed.
+
+        """
+        self.index = [(os.path.relpath(task.dirname, dirname),
+                       task.runscript.fname) for task in tasks]
+        self._set_range(0, None)
+
+    def _set_range(self, start, stop):
+        """Execute the lines start to stop (excluded) of the index file."""
+        self.start, self.stop = start, stop
+
+        if self._directive in self.header:
+            self.header.remove(self._directive)
+        self._directive = None
+        if self.ntasks:
+            self._directive = self.array_directive.format(
+                first=0, last=self.ntasks - 1, first1=1, last1=self.ntasks)
+            self.header.insert(0, self._directive)
+
+        self['INDEX_FILE'] = self.index_fname
+        del self.main[:]
+        self.main.extend(_EXECUTION.replace('INDEX_VARIABLE',
+                                            self.index_variable)
+                                   .replace('OFFSET', str(self.offset))
+                                   .replace('START', str(self.start))
+                                   .strip().splitlines())
+
+    def split(self):
+        """
+        Return the list of scripts executing the tasks by chunks
+        of at most max_size elements, which all read the same index file.
+        Returns [self] if the array does not exceed max_size.
+        """
+        if not self.max_size or self.ntasks <= self.max_size:
+            return [self]
+
+        import copy
+        scripts = list()
+        for start in range(0, len(self.index), self.max_size):
+            script = copy.deepcopy(self)
+            script._set_range(start, start + self.max_size)
+            scripts.append(script)
+        return scripts
+
+    def iter_index_lines(self):
+        """Iterate over the lines of the index file."""
+        for dirname, script in self.index:
+            yield '{}\t{}\n'.format(dirname, script)
+
+    def write_index(self, fname):
+        """
+        Write the index file, unless it is unchanged.
+        Returns 'created', 'updated' or 'unchanged'.
+        """
+        return write_if_changed(fname, self.iter_index_lines)
+
+    def get_indices(self):
+        """Return the indices of the array elements."""
+        return list(range(self.offset, self.ntasks + self.offset))
+
+    def submit(self, cwd=None, command='sbatch'):
+        """
+        Submit the script with a single call of the submission command,
+        and return its exit code.
+
+        Keyword arguments
+        -----------------
+
+        cwd : str (None)
+            Directory from which the script is submitted.
+        command : str ('sbatch')
+            Submission command, e.g. 'qsub'.
+
+        """
+        import subprocess
+        return subprocess.call(command.split() + [self.fname], cwd=cwd)
+
+    def run_local(self, cwd=None, nthreads=None, indices=None):
+        """
+        Execute the elements of the array on the local machine,
+        standing in for the batch scheduler. Returns the exit code
+        of each element, in a list.
+
+        Keyword arguments
+        -----------------
+
+        cwd : str (None)
+            Directory from which the script is executed.
+        nthreads : int (None)
+            Number of elements executed in parallel.
+            Default is the number of cores of the machine.
+        indices : list (None)
+            Indices of the elements to be executed. Default is all.
+
+        """
+        import subprocess
+        from multiprocessing.pool import ThreadPool
+
+        if indices is None:
+            indices = self.get_indices()
+        if not indices:
+            return list()
+        if not nthreads:
+            import multiprocessing
+            nthreads = multiprocessing.cpu_count()
+
+        def run_element(index):
+            env = dict(os.environ)
+            env[self.index_variable] = str(index)
+            return subprocess.call(['bash', self.fname], cwd=cwd, env=env)
+
+        pool = ThreadPool(min(nthreads, len(indices)))
+        try:
+            return pool.map(run_element, indices)
+        finally:
+            pool.close()
+            pool.join()
@@ -0,0 +1,244 @@
+from __future__ import print_function
+import os
+
+try:
+    from shlex import quote
+except ImportError:  # Py2
+    from pipes import quote
+
+from .runscript import RunScript
+
+# Public
+__all__ = ['PackedScript', 'read_exit_status']
+
+# Launchers of the run script of a task within its slice of cores.
+# The slice is given by the variables PACK_CORES (e.g. '4,5,6,7')
+# and PACK_NPROC, exported before the launcher is called.
+LOCAL_LAUNCHER = ''
+TASKSET_LAUNCHER = 'taskset -c $PACK_CORES'
+
+# Extension of the file holding the exit status of a run script.
+EXIT_STATUS_EXT = '.exit'
+
+# Scheduler of the tasks within the allocation (bash 4.3+).
+# state: 0 pending, 1 running, 2 completed, 3 failed, 4 skipped
+_SCHEDULER = r"""
+free=$NCORES
+for ((c = 0; c < NCORES; c++)); do owner[c]=-1; done
+for i in "${!order[@]}"; do state[i]=0; done
+pids=()
+first=0
+
+launch() {
+    local i=$1 n=${nprocs[$1]} c cores=()
+    for ((c = 0; c < NCORES && ${#cores[@]} < n; c++)); do
+        if [ ${owner[c]} = -1 ]; then
+            owner[c]=$i
+            cores+=($c)
+        fi
+    done
+    rm -f "${dirs[i]}/${scripts[i]}EXIT_STATUS_EXT"
+    (
+        cd "${dirs[i]}" || exit 0
+        export PACK_CORES=$(IFS=,; echo "${cores[*]}") PACK_NPROC=$n
+        LAUNCHER bash "${scripts[i]}"
+        echo $? > "${scripts[i]}EXIT_STATUS_EXT.tmp"
+        mv -f "${scripts[i]}EXIT_STATUS_EXT.tmp" "${scripts[i]}EXIT_STATUS_EXT"
+        exit 0
+    ) &
+    pids[i]=$!
+    state[i]=1
+    free=$((free - n))
+}
+
+reap() {
+    local i c rc
+    for i in "${!pids[@]}"; do
+        kill -0 ${pids[i]} 2> /dev/null && continue
+        unset 'pids[i]'
+        rc=127
+        if [ -f "${dirs[i]}/${scripts[i]}EXIT_STATUS_EXT" ]; then
+            read rc < "${dirs[i]}/${scripts[i]}EXIT_STATUS_EXT"
+        fi
+        if [ "$rc" = 0 ]; then state[i]=2; else state[i]=3; fi
+        echo "Exit status $rc: ${dirs[i]}/${scripts[i]}"
+        for ((c = 0; c < NCORES; c++)); do
+            [ ${owner[c]} = $i ] && owner[c]=-1
+        done
+        free=$((free + nprocs[i]))
+    done
+}
+
+while :; do
+
+    # Start every task that is ready and fits in the free cores,
+    # including the tasks that come after a task that does not fit.
+    for ((k = first; k < ${#order[@]} && free > 0; k++)); do
+        i=${order[k]}
+        [ ${state[i]} = 0 ] || continue
+        ready=1
+        for j in ${deps[i]}; do
+            case ${state[j]} in
+                2) ;;
+                3|4) ready=-1; break ;;
+                *) ready=0 ;;
+            esac
+        done
+        if [ $ready = -1 ]; then
+            state[i]=4
+            echo "Skipped: ${dirs[i]}/${scripts[i]}"
+        elif [ $ready = 1 ] && [ ${nprocs[i]} -le $free ]; then
+            launch $i
+        fi
+    done
+    while [ $first -lt ${#order[@]} ] && [ ${state[${order[first]}]} != 0 ]; do
+        first=$((first + 1))
+    done
+
+    [ ${#pids[@]} = 0 ] && break
+
+    # Wait for any task to finish
+    wait -n
+    reap
+done
+
+nfailed=0
+for i in "${!order[@]}"; do
+    [ ${state[i]} = 2 ] || nfailed=$((nfailed + 1))
+done
+echo "$nfailed of ${#order[@]} tasks failed or were skipped."
+[ $nfailed = 0 ]
+"""
+
+
+def read_exit_status(task):
+    """
+    Return the exit status of the run script of a task executed
+    by a PackedScript, or None if it has not finished.
+    """
+    fname = task.runscript_fname + EXIT_STATUS_EXT
+    try:
+        with open(fname, 'r') as f:
+            return int(f.read().strip())
+    except (IOError, OSError, ValueError):
+        return None
+
+
+class PackedScript(RunScript):
+    """
+    Allocation script executing many tasks concurrently
+    within a single batch allocation of ncores cores.
+
+    Each task occupies a slice of nproc cores for MPI tasks,
+    or a single core otherwise, and is started as soon as enough cores
+    are free and the tasks it depends on have completed. Whenever a task
+    finishes, the following tasks that fit in the free cores are started,
+    even if an earlier task is waiting for more cores.
+    The exit status of the run script of each task is written
+    in the file '<runscript>.exit' of its directory, e.g. 'run.sh.exit'.
+
+    The script is executed from the directory given to set_tasks,
+    and requires bash 4.3 or later.
+    With a header, it can be submitted to a batch scheduler, e.g.
+
+        >>> script = PackedScript(64, header=['#SBATCH --ntasks=64'])
+
+    Without scheduler, the script is simply executed with bash,
+    which stands in for the allocation on the local machine.
+    """
+
+    def __init__(self, ncores, launcher=None, *args, **kwargs):
+        """
+        Arguments
+        ---------
+
+        ncores : int
+            Number of cores of the allocation.
+
+        Keyword arguments
+        -----------------
+
+        launcher : str (None)
+            Command prefixed to 'bash <runscript>' when executing a task.
+            It may use the variables PACK_CORES, the comma-separated list
+            of the cores of the task, and PACK_NPROC, their number.
+            E.g. 'taskset -c $PACK_CORES' pins each task to its cores.
+            Default is to execute the run script directly.
+
+        Any other keyword argument is passed to RunScript,
+        e.g. header to make the script a submission file.
+
+        """
+        super(PackedScript, self).__init__(*args, **kwargs)
+        self.ncores = int(ncores)
+        self.launcher = launcher or LOCAL_LAUNCHER
+
+    def get_task_ncores(self, task):
+        """Return the number of cores occupied by a task."""
+        nproc = getattr(task, 'nproc', 1) or 1
+        return max(1, min(int(nproc), self.ncores))
+
+    def set_tasks(self, dirname, tasks, graph=None, cost=None):
+        """
+        Set the tasks executed by the script, replacing the previous ones.
+
+        Arguments
+        ---------
+
+        dirname : str
+            Directory from which the script is executed.
+        tasks : list
+            The tasks to be executed.
+
+        Keyword arguments
+        -----------------
+
+        graph : TaskGraph (None)
+            Dependencies between the tasks. A task is started only once
+            all the tasks it depends on have completed, and is skipped
+            if any of them fails. Tasks that do not belong
+            to the list of tasks are considered as completed.
+        cost : function (None)
+            Function returning the expected duration of a task,
+            e.g. CostModel.predict. The longest tasks are started first.
+            If None, the tasks are started in order.
+
+        """
+        tasks = list(tasks)
+        order = list(tasks)
+        if graph is not None:
+            scheduled = set(tasks)
+            order = [task for task in graph.topological_sort()
+                     if task in scheduled]
+
+        if cost is not None:
+            if graph is not None:
+                priorities = graph.get_path_lengths(cost)
+            else:
+                priorities = dict((task, cost(task)) for task in order)
+            order.sort(key=lambda task: priorities.get(task, 0), reverse=True)
+
+        index = dict((task, i) for i, task in enumerate(tasks))
+
+        del self.main[:]
+        self.main.append('NCORES={}'.format(self.ncores))
+        self.main.append('')
+        for i, task in enumerate(tasks):
+            deps = list()
+            if graph is not None:
+                deps = [index[parent] for parent in graph.get_parents(task)
+                        if parent in index]
+            self.main.extend([
+                'dirs[{}]={}'.format(
+                    i, quote(os.path.relpath(task.dirname, dirname))),
+                'scripts[{}]={}'.format(i, quote(task.runscript.fname)),
+                'nprocs[{}]={}'.format(i, self.get_task_ncores(task)),
+                'deps[{}]="{}"'.format(i, ' '.join(str(j) for j in deps)),
+                ])
+        self.main.append('order=({})'.format(
+            ' '.join(str(index[task]) for task in order)))
+
+        launcher = self.launcher + ' ' if self.launcher else ''
+        scheduler = _SCHEDULER.replace('EXIT_STATUS_EXT', EXIT_STATUS_EXT)
+        scheduler = scheduler.replace('LAUNCHER ', launcher)
+        self.main.extend(scheduler.splitlines())
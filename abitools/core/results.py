@@ -0,0 +1,316 @@
+from __future__ import print_function
+import os
+from collections import OrderedDict
+
+from ..utils import lazy_import
+from .statuscache import get_fingerprint
+
+np = lazy_import('numpy')
+
+# Public
+__all__ = ['ResultsStore']
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _make_column(values):
+    """
+    Convert a list of values into an array. Numbers and arrays of
+    a common shape give a float or int array, with nan for missing values.
+    Strings give a string array. Anything else gives an object array.
+    """
+    present = [v for v in values if not _is_missing(v)]
+    complete = len(present) == len(values)
+
+    array = None
+    if present:
+        try:
+            array = np.array(present)
+        except ValueError:  # Ragged values
+            array = None
+
+    if not present:
+        return np.full(len(values), np.nan)
+
+    if array is not None and array.dtype.kind in 'biuf':
+        if complete:
+            return array
+        column = np.full((len(values),) + array.shape[1:], np.nan)
+        column[[not _is_missing(v) for v in values]] = array
+        return column
+
+    if array is not None and array.dtype.kind == 'U' and array.ndim == 1:
+        if complete:
+            return array
+
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = None if _is_missing(value) else value
+    return column
+
+
+class ResultsStore(object):
+    """
+    Columnar store of the results of many tasks, saved in a npz file.
+
+    Each row corresponds to a task, and holds its directory, its output file
+    name, its status, its input variables (in columns prefixed with 'input.'),
+    the results returned by task.get_results(), and the overall timing
+    returned by task.get_timing() (in columns prefixed with 'timing.').
+    The rows are indexed by output file name, or by directory
+    for tasks without output file.
+
+    Ingestion is incremental: a task is only parsed again
+    when its input or output file changed since the last harvest.
+
+    Example usage:
+
+    >> store = ResultsStore('results.npz')
+    >> store.harvest(workflow)
+    >> store.save()
+    >> mask = (store['input.ecut'] == 30.) & (store['status'] == 'Completed')
+    >> store['etotal'][mask]
+    >> 
+    >> # Cost of a sweep as a function of ecut
+    >> store['input.ecut'], store['timing.wall_time'] * store['timing.nproc']
+    """
+
+    _KEY_COLUMNS = ('dirname', 'output_fname', 'status', 'fingerprint')
+    _INPUT_PREFIX = 'input.'
+    _TIMING_PREFIX = 'timing.'
+
+    def __init__(self, fname):
+        """
+        Arguments
+        ---------
+
+        fname : str
+            Name of the npz file. Read if it exists.
+
+        """
+        self.fname = fname
+        self._columns = OrderedDict()
+        self._index = dict()
+        self.load()
+
+    def load(self):
+        """Read the store file."""
+        self._columns.clear()
+        self._index.clear()
+
+        if not os.path.exists(self.fname):
+            return
+
+        with np.load(self.fname, allow_pickle=True) as data:
+            for name in data.files:
+                self._columns[name] = data[name]
+
+        self._build_index()
+
+    def save(self):
+        """Write the store file."""
+        tmp_fname = self.fname + '.tmp'
+        with open(tmp_fname, 'wb') as f:
+            np.savez(f, **self._columns)
+        os.rename(tmp_fname, self.fname)
+
+    def _build_index(self):
+        self._index = dict((self._get_key(dirname, output_fname), i)
+            for i, (dirname, output_fname) in enumerate(zip(
+                self._columns['dirname'], self._columns['output_fname'])))
+
+    @staticmethod
+    def _get_key(dirname, output_fname):
+        return os.path.normpath(output_fname or dirname)
+
+    @staticmethod
+    def _get_task_fingerprint(task):
+        """
+        Return the fingerprints of the input and output files of a task
+        as a string, or None if the task has no such files.
+        """
+        input_fname = getattr(task, 'input_fname', None)
+        output_fname = getattr(task, 'output_fname', None)
+        if not input_fname or not output_fname:
+            return None
+
+        fingerprint = list()
+        for fname in (input_fname, output_fname):
+            try:
+                fingerprint.extend(get_fingerprint(os.stat(fname)))
+            except OSError:
+                fingerprint.append(None)
+        return repr(fingerprint)
+
+    def _get_record(self, task):
+        """Return the row of a task, as a dict."""
+        record = OrderedDict()
+        record['dirname'] = task.dirname
+        record['output_fname'] = getattr(task, 'output_fname', '') or ''
+        record['status'] = task.get_status()
+        record['fingerprint'] = self._get_task_fingerprint(task) or ''
+
+        inp = getattr(task, 'input', None)
+        for name, value in getattr(inp, 'variables', dict()).items():
+            record[self._INPUT_PREFIX + name] = value
+
+        record.update(task.get_results())
+
+        for name, value in task.get_timing().items():
+            if name != 'datasets':
+                record[self._TIMING_PREFIX + name] = value
+
+        return record
+
+    def harvest(self, tasks, nthreads=1):
+        """
+        Parse the tasks whose files changed since the last harvest,
+        and update their rows. Returns the number of tasks parsed.
+
+        Arguments
+        ---------
+
+        tasks : list
+            The tasks, e.g. a Workflow.
+
+        Keyword arguments
+        -----------------
+
+        nthreads : int (1)
+            Number of threads parsing the tasks concurrently.
+
+        """
+        fingerprints = self._columns.get('fingerprint')
+
+        todo = list()
+        for task in tasks:
+            key = self._get_key(task.dirname,
+                                getattr(task, 'output_fname', ''))
+            row = self._index.get(key)
+            if row is not None:
+                fingerprint = self._get_task_fingerprint(task)
+                if fingerprint and fingerprint == fingerprints[row]:
+                    continue
+            todo.append(task)
+
+        if nthreads > 1 and len(todo) > 1:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(min(nthreads, len(todo)))
+            try:
+                records = pool.map(self._get_record, todo)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            records = list(map(self._get_record, todo))
+
+        self.update(records)
+        return len(records)
+
+    @staticmethod
+    def _set_value(column, row, value):
+        """
+        Set a value in a column, in place. Returns False if the value
+        does not fit in the column, in which case the column must be rebuilt.
+        """
+        kind = column.dtype.kind
+        if kind == 'O':
+            column[row] = None if _is_missing(value) else value
+            return True
+
+        if _is_missing(value):
+            if kind != 'f':
+                return False
+            column[row] = np.nan
+            return True
+
+        if kind == 'U':
+            if (not isinstance(value, str)
+                or len(value) > column.dtype.itemsize // 4):
+                return False
+            column[row] = value
+            return True
+
+        array = np.asarray(value)
+        if (array.dtype.kind not in 'biuf' or array.shape != column.shape[1:]
+            or not np.can_cast(array.dtype, column.dtype)):
+            return False
+        column[row] = array
+        return True
+
+    def _update_inplace(self, records):
+        """
+        Replace existing rows without rebuilding the columns.
+        Returns False if the columns must be rebuilt.
+        """
+        columns = OrderedDict((name, column.copy())
+                              for name, column in self._columns.items())
+
+        for record in records:
+            key = self._get_key(record['dirname'], record['output_fname'])
+            row = self._index.get(key)
+            if row is None or not set(record).issubset(columns):
+                return False
+            for name, column in columns.items():
+                if not self._set_value(column, row, record.get(name)):
+                    return False
+
+        self._columns = columns
+        return True
+
+    def update(self, records):
+        """
+        Add or replace rows, given as dicts of values indexed by column name.
+        Each record must contain a 'dirname' and an 'output_fname'.
+        """
+        if not records:
+            return
+
+        if self._columns and self._update_inplace(records):
+            return
+
+        nrows = len(self)
+        columns = OrderedDict((name, column.tolist())
+                              for name, column in self._columns.items())
+
+        for record in records:
+            key = self._get_key(record['dirname'], record['output_fname'])
+            row = self._index.get(key)
+            if row is None:
+                row = nrows
+                nrows += 1
+                self._index[key] = row
+                for values in columns.values():
+                    values.append(None)
+            else:
+                for values in columns.values():
+                    values[row] = None
+
+            for name, value in record.items():
+                if name not in columns:
+                    columns[name] = [None] * nrows
+                columns[name][row] = value
+
+        for name, values in columns.items():
+            if name in self._KEY_COLUMNS:
+                values = ['' if v is None else v for v in values]
+            self._columns[name] = _make_column(values)
+
+    @property
+    def columns(self):
+        """Names of the columns."""
+        return list(self._columns.keys())
+
+    def __getitem__(self, name):
+        """Return a column as a numpy array."""
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __len__(self):
+        if not self._columns:
+            return 0
+        return len(self._columns['dirname'])
@@ -1,8 +1,8 @@
 from collections import OrderedDict
-import subprocess
 
 from ..config import default_runscript
 from .writable import Writable
+from .instrumentation import instrumented
 
 # Public
 __all__ = ['RunScript']
@@ -138,7 +138,7 @@ class RunScript(Writable):
         """Delete a variable."""
         del self.variables[key]
 
-    def _get_quoted_string(self, value):
+    def _get_quoted_string(self, value, name=''):
 
         # Strip the value of single or double quotes
         # but strip a single occurence
@@ -163,40 +163,66 @@ class RunScript(Writable):
 
         return value
 
-    def __str__(self):
-        S = ''
-        S += self.first_line + 2 * '\n'
+    def iter_chunks(self):
+        """Iterate over the lines of the script, including the newlines."""
+        yield self.first_line + 2 * '\n'
 
-        S += '\n'
+        yield '\n'
         for line in self.header:
-            S += line + '\n'
+            yield line + '\n'
 
         for name, value in self.variables.items():
-            value = self._get_quoted_string(value)
-            S += '{}={}\n'.format(name, value)
+            value = self._get_quoted_string(value, name)
+            yield '{}={}\n'.format(name, value)
 
         if self.links:
-            S += '\n'
+            yield '\n'
             for target, dest in self.links:
                 # Don't attempt to create a link if the names match.
                 if target == dest:
                     continue
-                S += 'ln -nfs {} {}\n'.format(target, dest)
+                yield 'ln -nfs {} {}\n'.format(target, dest)
 
         if self.copies:
-            S += '\n'
+            yield '\n'
             for src, dest in self.copies:
-                S += 'cp -f {} {}\n'.format(src, dest)
+                yield 'cp -f {} {}\n'.format(src, dest)
 
-        S += '\n'
+        yield '\n'
         for line in self.main:
-            S += line + '\n'
+            yield line + '\n'
 
-        S += '\n'
+        yield '\n'
         for line in self.footer:
-            S += line + '\n'
+            yield line + '\n'
+
+    def write_to(self, fileobj):
+        """Write the script into an open file, one line at a time."""
+        fileobj.writelines(self.iter_chunks())
 
-        return S
+    def __str__(self):
+        return ''.join(self.iter_chunks())
 
-    def run(self):
-        subprocess.call(['bash', self.fname])
+    @instrumented('runscript')
+    def run(self, cwd=None):
+        """
+        Execute the script and return its exit code.
+
+        Keyword arguments
+        -----------------
+
+        cwd : str (None)
+            Directory from which the script is executed.
+            Default is the current directory.
+
+        """
+        import subprocess
+        return subprocess.call(['bash', self.fname], cwd=cwd)
+
+    def arun(self, cwd=None, timeout=None):
+        """
+        Return a coroutine that executes the script
+        and returns its exit code. See asyncrunner.arun_script.
+        """
+        from .asyncrunner import arun_script
+        return arun_script(self, cwd=cwd, timeout=timeout)
@@ -0,0 +1,83 @@
+from __future__ import print_function
+import os
+
+from ..utils import last_lines_contain, JSONLinesIndex
+
+# Public
+__all__ = ['StatusCache', 'get_fingerprint']
+
+
+def get_fingerprint(stat):
+    """Return the (size, mtime, inode) fingerprint of an os.stat result."""
+    return [stat.st_size, stat.st_mtime, stat.st_ino]
+
+
+class StatusCache(JSONLinesIndex):
+    """
+    On-disk cache for the completion check of output files.
+
+    The cache maps an output file name and a completion tag
+    to the result of the tail check, together with the fingerprint
+    (size, mtime, inode) of the file at the time it was read.
+    A file is only read again when its fingerprint changes.
+
+    Entries are stored in a JSON-lines index file, one entry per line,
+    in which the last entry for a given file prevails.
+    See JSONLinesIndex.
+    """
+
+    def __init__(self, fname):
+        """
+        Arguments
+        ---------
+
+        fname : str
+            Name of the index file. Created at the first flush if needed.
+
+        """
+        super(StatusCache, self).__init__(fname)
+
+    @staticmethod
+    def _get_key(fname, tag):
+        return (os.path.abspath(fname), tag)
+
+    def _get_entry_key(self, entry):
+        return (entry['fname'], entry['tag'])
+
+    def contains_tag(self, fname, tag, stat=None):
+        """
+        True if the last lines of fname contain tag.
+        The result is taken from the cache if the file did not change.
+
+        Arguments
+        ---------
+
+        fname : str
+            Name of the output file.
+        tag : str
+            Completion tag.
+
+        Keyword arguments
+        -----------------
+
+        stat : os.stat_result (None)
+            The result of os.stat(fname), if already known.
+
+        """
+        if stat is None:
+            stat = os.stat(fname)
+
+        key = self._get_key(fname, tag)
+        fingerprint = get_fingerprint(stat)
+
+        entry = self._get_entry(key)
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            return entry['found']
+
+        found = last_lines_contain(fname, tag)
+
+        entry = dict(fname=key[0], tag=tag,
+                     fingerprint=fingerprint, found=found)
+        self._add_entry(entry)
+
+        return found
@@ -0,0 +1,140 @@
+from __future__ import print_function
+import os
+from collections import OrderedDict
+
+from .task import IOTask
+
+# Public
+__all__ = ['scan_status']
+
+
+class _DirEntry(object):
+    """Stand-in for os.DirEntry, where os.scandir is missing (Py2)."""
+
+    __slots__ = ('name', 'path')
+
+    def __init__(self, dirname, name):
+        self.name = name
+        self.path = os.path.join(dirname, name)
+
+    def stat(self):
+        return os.stat(self.path)
+
+
+def _list_directory(dirname):
+    """Return a dict of the directory entries, indexed by name."""
+    if not hasattr(os, 'scandir'):  # Py2
+        try:
+            names = os.listdir(dirname)
+        except OSError:
+            return dict()
+        return dict((name, _DirEntry(dirname, name)) for name in names)
+
+    try:
+        entries = os.scandir(dirname)
+    except OSError:
+        return dict()
+    try:
+        return dict((entry.name, entry) for entry in entries)
+    finally:
+        if hasattr(entries, 'close'):
+            entries.close()
+
+
+def _has_default_status(task):
+    """True if the status of the task is given by IOTask.get_status."""
+    return (isinstance(task, IOTask)
+            and 'get_status' not in vars(task)
+            and type(task).get_status is IOTask.get_status)
+
+
+def scan_status(tasks, check_time=False, nthreads=1):
+    """
+    Return the status of many tasks, in an OrderedDict indexed by task.
+
+    The tasks relying on IOTask.get_status are grouped by directory,
+    and each directory is listed once with os.scandir (os.listdir
+    on Python 2), which tells which input and output files exist.
+    The files are only stat'ed when check_time is set, or when the task
+    has a status cache.
+    The completion tag is searched only in the outputs of tasks
+    that are candidate for completion.
+    Other tasks are queried with their own get_status method.
+
+    Arguments
+    ---------
+
+    tasks : list
+        The tasks to be checked.
+
+    Keyword arguments
+    -----------------
+
+    check_time : bool (False)
+        Consider a task as unstarted if output is older than input.
+    nthreads : int (1)
+        Number of threads reading the output files concurrently.
+
+    """
+    statuses = OrderedDict((task, None) for task in tasks)
+    kwargs = dict(check_time=True) if check_time else dict()
+
+    directories = dict()
+    candidates = list()
+
+    for task in statuses:
+
+        if not _has_default_status(task):
+            statuses[task] = task.get_status(**kwargs)
+            continue
+
+        if not task.input_fname or not task.output_fname:
+            statuses[task] = task._STATUS_UNKNOWN
+            continue
+
+        # The existence of the files is given by the directory listings.
+        # They are only stat'ed to compare their modification times,
+        # or to fingerprint the output for the status cache.
+        stats = list()
+        for fname, needs_stat in (
+                (task.input_fname, check_time),
+                (task.output_fname,
+                 check_time or task.status_cache is not None)):
+            dirname, basename = os.path.split(fname)
+            if dirname not in directories:
+                directories[dirname] = _list_directory(dirname or os.curdir)
+            entry = directories[dirname].get(basename)
+            if entry is None:
+                break
+            if not needs_stat:
+                stats.append(None)
+                continue
+            try:
+                stats.append(entry.stat())
+            except OSError:
+                break
+
+        if len(stats) < 2:
+            statuses[task] = task._STATUS_UNSTARTED
+        else:
+            candidates.append((task, stats[0], stats[1]))
+
+    def get_status_from_stat(candidate):
+        task, input_stat, output_stat = candidate
+        return task.get_status_from_stat(input_stat, output_stat, check_time)
+
+    if nthreads > 1 and len(candidates) > 1:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(min(nthreads, len(candidates)))
+        try:
+            results = pool.map(get_status_from_stat, candidates)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = map(get_status_from_stat, candidates)
+
+    for (task, input_stat, output_stat), status in zip(candidates, results):
+        statuses[task] = status
+
+    return statuses
@@ -1,13 +1,14 @@
 from __future__ import print_function
 import sys
 import os
-import subprocess
 import pickle
 import contextlib
 
 from ..config import default_mpi
-from ..utils import exec_from_dir, last_lines_contain
+from ..utils import exec_from_dir, last_lines_contain, mkdir_p
 from .runscript import RunScript
+from .instrumentation import instrumented
+from .writable import WriteSummary, write_if_changed
 
 # Public
 __all__ = ['Task', 'MPITask', 'IOTask']
@@ -32,6 +33,12 @@ class Task(object):
         }
     _end_color = '\033[0m'
 
+    # A StatusCache shared with the workflow, if any.
+    status_cache = None
+
+    # A CalculationCache shared with the workflow, if any.
+    calculation_cache = None
+
     def __init__(self, dirname='./', runscript_fname='run.sh', store_variables=False, *args, **kwargs):
         """
         Keyword arguments
@@ -86,19 +93,66 @@ class Task(object):
     def exec_from_dirname(self):
         return exec_from_dir(self.dirname)
 
+    @instrumented('run')
     def run(self):
-        with self.exec_from_dirname():
-            self.runscript.run()
-        return self.get_status()
+        key = self.get_cache_key()
+        try:
+            if key is not None and self.restore_from_cache(key):
+                return self.get_status()
+
+            self.runscript.run(cwd=self.dirname)
+            status = self.get_status()
+
+            if key is not None and status == self._STATUS_COMPLETED:
+                self.store_in_cache(key)
+
+            return status
+
+        finally:
+            if self.calculation_cache is not None:
+                self.calculation_cache.flush()
+
+    def arun(self, timeout=None, poll_interval=None, on_status=None, **kwargs):
+        """
+        Return a coroutine that executes the task and returns its status,
+        e.g.
+
+            >>> status = await task.arun(timeout=3600)
+
+        Keyword arguments
+        -----------------
+
+        timeout : float (None)
+            Wall-clock time limit, in seconds. When it expires,
+            the execution is terminated and the status is returned.
+        poll_interval : float (None)
+            Interval, in seconds, between status checks while running.
+        on_status : function (None)
+            Function called as on_status(task, status) after each check.
 
+        Any other keyword argument is passed to get_status.
+        """
+        from .asyncrunner import arun_task
+        return arun_task(self, timeout=timeout, poll_interval=poll_interval,
+                         on_status=on_status, **kwargs)
+
+    @instrumented('write')
     def write(self):
-        subprocess.call(['mkdir', '-p', self.dirname])
-        with self.exec_from_dirname():
-            self.runscript.write()
+        """
+        Write the files of the task. Files whose content did not change
+        are left untouched. Returns a WriteSummary.
+        """
+        summary = WriteSummary()
+        mkdir_p(self.dirname)
+        summary.add(self.runscript_fname,
+                    self.runscript.write(self.runscript_fname))
 
-            if self.variables:
-                with open('variables.pkl', 'w') as f:
-                    pickle.dump(self.variables, f)
+        if self.variables:
+            fname = os.path.join(self.dirname, 'variables.pkl')
+            summary.add(fname, write_if_changed(fname,
+                                                pickle.dumps(self.variables)))
+
+        return summary
 
     def update_link(self, target, dest):
         """
@@ -144,13 +198,129 @@ class Task(object):
         else:
             self.runscript.add_copy(relsource, dest)
 
-    def get_status(self):
+    def get_input_paths(self):
+        """
+        Return the paths of the files that are linked or copied
+        into the task directory, normalized but not resolved.
+        """
+        paths = list()
+        for target, dest in self.runscript.links:
+            paths.append(os.path.normpath(os.path.join(
+                self.dirname, os.path.dirname(dest), target)))
+        for source, dest in self.runscript.copies:
+            paths.append(os.path.normpath(os.path.join(self.dirname, source)))
+        return paths
+
+    def get_status(self, check_time=False):
         """
         Return the status of the task. Possible status are:
         Completed, Unstarted, Unfinished, Unknown.
         """
         return self._STATUS_UNKNOWN
+
+    def _split_input_paths(self):
+        """
+        Return the linked or copied files as (dest, path) pairs,
+        separated into those lying outside and inside the task directory.
+        """
+        dirname = os.path.normpath(os.path.abspath(self.dirname))
+        dests = [dest for target, dest in self.runscript.links]
+        dests += [dest for source, dest in self.runscript.copies]
+
+        external, internal = list(), list()
+        for dest, path in zip(dests, self.get_input_paths()):
+            path = os.path.abspath(path)
+            if path.startswith(dirname + os.sep):
+                internal.append((dest, os.path.relpath(path, dirname)))
+            else:
+                external.append((dest, path))
+
+        return external, internal
+
+    def get_content_string(self):
+        """
+        Return a string that identifies the calculation together with
+        the content of the files given by get_content_files,
+        or None if the task cannot be cached.
+        It is made of the class name, the rendered input,
+        and the links made within the task directory.
+        """
+        inp = getattr(self, 'input', None)
+        if inp is None:
+            return None
+
+        lines = [type(self).__name__, str(inp)]
+        external, internal = self._split_input_paths()
+        for dest, path in internal:
+            lines.append('{} -> {}'.format(dest, path))
+
+        return '\n'.join(lines)
+
+    def get_content_files(self):
+        """
+        Return the files whose content identifies the calculation,
+        as (label, fname) pairs. These are the files linked or copied
+        from outside the task directory, labeled by their destination.
+        """
+        external, internal = self._split_input_paths()
+        return external
+
+    def get_output_paths(self):
+        """
+        Return the paths of the files produced by the task,
+        relative to its directory, starting with the main output file.
+        """
+        return list()
+
+    def get_cache_key(self):
+        """
+        Return the content hash of the task in the calculation cache,
+        or None if there is no cache or if the task cannot be cached.
+        """
+        if self.calculation_cache is None:
+            return None
+        return self.calculation_cache.get_key(self)
+
+    def restore_from_cache(self, key=None):
+        """
+        Populate the task directory with the outputs of an identical
+        calculation that completed, if the calculation cache has one.
+        Returns True if the outputs were restored.
+        """
+        if key is None:
+            key = self.get_cache_key()
+        if key is None:
+            return False
+
+        entry = self.calculation_cache.lookup(key)
+        if entry is None:
+            return False
+
+        self.calculation_cache.restore(entry, self)
+        return True
+
+    def store_in_cache(self, key=None):
+        """Record the outputs of the task in the calculation cache."""
+        if key is None:
+            key = self.get_cache_key()
+        if key is None or not self.get_output_paths():
+            return
+        self.calculation_cache.add(key, self)
         
+    def get_results(self):
+        """
+        Return the results of the task in a dict, indexed by name.
+        Empty for a generic task.
+        """
+        return dict()
+
+    def get_timing(self):
+        """
+        Return the cpu and wall times of the run and the number
+        of processes used, as read from the output. Empty for a generic task.
+        """
+        return dict()
+
     def is_complete(self):                                                                                                                                       
         """True if the task reports a completed status."""
         status = self.get_status()
@@ -345,27 +515,49 @@ class IOTask(Task):
     # It is important that this task has no __init__ function,
     # because it is mostly used with multiple-inheritance classes.
 
+    @instrumented('get_status')
     def get_status(self, check_time=False):
 
         if not self.input_fname or not self.output_fname:
             return self._STATUS_UNKNOWN
 
-        if not os.path.exists(self.input_fname):
+        try:
+            input_stat = os.stat(self.input_fname)
+            output_stat = os.stat(self.output_fname)
+        except OSError:
             return self._STATUS_UNSTARTED
 
-        if not os.path.exists(self.output_fname):
-            return self._STATUS_UNSTARTED
+        return self.get_status_from_stat(input_stat, output_stat, check_time)
 
-        input_creation_time = os.path.getmtime(self.input_fname)
-        output_creation_time = os.path.getmtime(self.output_fname)
+    def get_output_paths(self):
+        path = os.path.relpath(self.output_fname, self.dirname)
+        if path == os.curdir:
+            return list()
+        return [path]
 
-        if check_time and input_creation_time > output_creation_time:
+    @instrumented('get_status')
+    def get_status_from_stat(self, input_stat, output_stat, check_time=False):
+        """
+        Return the status of the task, given the os.stat results
+        of the input and output files, which must both exist.
+        The results may be None when they are not needed, i.e.
+        input_stat without check_time, and output_stat without
+        check_time nor status cache.
+        """
+        if check_time and input_stat.st_mtime > output_stat.st_mtime:
             return self._STATUS_UNSTARTED
 
         if not self._TAG_JOB_COMPLETED:
             return self._STATUS_UNKNOWN
 
-        if last_lines_contain(self.output_fname, self._TAG_JOB_COMPLETED):
+        if self.status_cache is not None:
+            completed = self.status_cache.contains_tag(
+                self.output_fname, self._TAG_JOB_COMPLETED, output_stat)
+        else:
+            completed = last_lines_contain(self.output_fname,
+                                           self._TAG_JOB_COMPLETED)
+
+        if completed:
             return self._STATUS_COMPLETED
 
         return self._STATUS_UNFINISHED
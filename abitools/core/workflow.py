@@ -1,7 +1,9 @@
 from __future__ import print_function
 import os
+from collections import OrderedDict
 
 from .task import Task
+from .instrumentation import instrumented
 
 __all__ = ['Workflow']
 
@@ -26,6 +28,18 @@ class Workflow(Task):
 
     """
 
+    # A ResultsStore in which the results of the tasks are harvested.
+    results_store = None
+
+    # A CostModel ordering the tasks executed concurrently.
+    cost_model = None
+
+    # A PackedScript executing the tasks within a single allocation.
+    packed_script = None
+
+    # An ArrayScript executing the tasks as a job array.
+    array_script = None
+
     def __init__(self, tasks=None, *args, **kwargs):
         super(Workflow, self).__init__(*args, **kwargs)
         self.tasks = list()
@@ -77,6 +91,12 @@ class Workflow(Task):
             else:
                 self.runscript.append('bash {}'.format(task.runscript.fname))
 
+        if self.status_cache is not None:
+            self._share_status_cache(task)
+
+        if self.calculation_cache is not None:
+            self._share_calculation_cache(task)
+
         self.tasks.append(task)
 
     def add_tasks(self, tasks, *args, **kwargs):
@@ -122,29 +142,296 @@ class Workflow(Task):
 
         return [ l.strip() for l in chunk.strip().splitlines() ]
 
-    def write(self):
-        super(Workflow, self).write()
-        for task in self.tasks:
-            task.write()
-        with self.exec_from_dirname():
-            # Overwrite any runscript of the children tasks
-            self.runscript.write()
+    @instrumented('write_workflow')
+    def write(self, nthreads=1):
+        """
+        Write the files of the workflow and its tasks. Files whose content
+        did not change are left untouched. Returns a WriteSummary.
+
+        Keyword arguments
+        -----------------
+
+        nthreads : int (1)
+            Number of threads writing the tasks concurrently.
+            The tasks of a sub-workflow are written by a single thread.
+
+        """
+        summary = super(Workflow, self).write()
+
+        if nthreads > 1 and len(self.tasks) > 1:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(min(nthreads, len(self.tasks)))
+            try:
+                summaries = pool.map(self._write_task, self.tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            summaries = map(self._write_task, self.tasks)
+
+        for task_summary in summaries:
+            summary.merge(task_summary or {})
+
+        # Overwrite any runscript of the children tasks
+        summary.add(self.runscript_fname,
+                    self.runscript.write(self.runscript_fname))
+
+        if self.packed_script is not None:
+            self._write_packed_script(summary)
+
+        if self.array_script is not None:
+            self._write_array_script(summary)
+
+        return summary
 
-    def get_status(self):
+    @staticmethod
+    def _write_task(task):
+        return task.write()
+
+    def get_status(self, **kwargs):
         """
         Return the status of the task. Possible status are:
         Completed, Unstarted, Unfinished, Unknown.
         """
-        for task in self.tasks:
-            status = task.get_status()
-            if status != self._STATUS_COMPLETED:
-                return status
-        else:
-            return self._STATUS_COMPLETED
-        
+        try:
+            for task in self.tasks:
+                status = task.get_status(**kwargs)
+                if status != self._STATUS_COMPLETED:
+                    return status
+            else:
+                return self._STATUS_COMPLETED
+        finally:
+            self.flush_status_cache()
+
     def report(self, *args, **kwargs):
+        try:
+            for task in self.tasks:
+                task.report(*args, **kwargs)
+        finally:
+            self.flush_status_cache()
+
+    def scan_status(self, check_time=False, nthreads=1):
+        """
+        Return the status of every task of the workflow and sub-workflows,
+        in an OrderedDict indexed by task. Each directory is listed
+        only once, and only the outputs that may be complete are read.
+
+        Keyword arguments
+        -----------------
+
+        check_time : bool (False)
+            Consider a task as unstarted if output is older than input.
+        nthreads : int (1)
+            Number of threads reading the output files concurrently.
+
+        """
+        from .statusscan import scan_status
+        try:
+            return scan_status(self, check_time=check_time, nthreads=nthreads)
+        finally:
+            self.flush_status_cache()
+
+    def set_status_cache(self, fname=None):
+        """
+        Cache the completion check of the tasks output files
+        in an index file, so that an output file is only read again
+        when its size, modification time or inode changes.
+
+        Keyword arguments
+        -----------------
+
+        fname : str
+            Name of the index file.
+            Default is '.status_cache.json' in the workflow directory.
+
+        """
+        if fname is None:
+            fname = os.path.join(self.dirname, '.status_cache.json')
+        from .statuscache import StatusCache
+        self.status_cache = StatusCache(fname)
+        for task in self.tasks:
+            self._share_status_cache(task)
+
+    def _share_status_cache(self, task):
+        task.status_cache = self.status_cache
+        if isinstance(task, Workflow):
+            for subtask in task.tasks:
+                task._share_status_cache(subtask)
+
+    def set_calculation_cache(self, fname=None):
+        """
+        Use a calculation cache, so that a task whose input, pseudopotentials
+        and linked files are identical to those of a calculation that
+        already completed is not executed. Its outputs are restored
+        from the completed calculation instead.
+        The same cache file can be shared among several workflows.
+
+        The tasks executed individually, e.g. with run, run_concurrently
+        or arun, are restored just before their execution. The tasks
+        executed by the packed or job-array scripts are restored when
+        the workflow is written, and left out of these scripts.
+
+        Keyword arguments
+        -----------------
+
+        fname : str
+            Name of the index file.
+            Default is '.calculation_cache.json' in the workflow directory.
+
+        """
+        if fname is None:
+            fname = os.path.join(self.dirname, '.calculation_cache.json')
+        from .calccache import CalculationCache
+        self.calculation_cache = CalculationCache(fname)
         for task in self.tasks:
-            task.report(*args, **kwargs)
+            self._share_calculation_cache(task)
+
+    def _share_calculation_cache(self, task):
+        task.calculation_cache = self.calculation_cache
+        if isinstance(task, Workflow):
+            for subtask in task.tasks:
+                task._share_calculation_cache(subtask)
+
+    def _restore_from_cache(self, tasks):
+        """
+        Restore the outputs of the tasks found in the calculation cache,
+        and return the other tasks.
+        """
+        if self.calculation_cache is None:
+            return list(tasks)
+        try:
+            return [task for task in tasks if not task.restore_from_cache()]
+        finally:
+            self.calculation_cache.flush()
+
+    def _store_in_cache(self, tasks):
+        """Record the completed tasks that are not yet in the cache."""
+        if self.calculation_cache is None:
+            return
+        try:
+            for task in tasks:
+                key = task.get_cache_key()
+                if (key is not None
+                    and self.calculation_cache.lookup(key) is None
+                    and task.get_status() == self._STATUS_COMPLETED):
+                    task.store_in_cache(key)
+        finally:
+            self.calculation_cache.flush()
+
+    @instrumented('run_workflow')
+    def run(self):
+        """
+        Execute the run script of the workflow, and return its status.
+        With a calculation cache, the outputs of the tasks are first
+        restored from identical calculations. If some tasks are restored,
+        the other ones are executed individually, in order, instead of
+        the run script. The completed tasks are then recorded.
+        """
+        tasks = list(self)
+        remaining = self._restore_from_cache(tasks)
+        try:
+            if len(remaining) == len(tasks):
+                self.runscript.run(cwd=self.dirname)
+            else:
+                for task in remaining:
+                    task.run()
+            return self.get_status()
+        finally:
+            self._store_in_cache(tasks)
+
+    def flush_status_cache(self):
+        """Write the status cache to disk, if any."""
+        if self.status_cache is not None:
+            self.status_cache.flush()
+
+    def set_cost_model(self, fname=None):
+        """
+        Use a CostModel to predict the wall time of the tasks, so that
+        run_concurrently and arun start the longest tasks first.
+        The wall time of each task that completes is recorded in the model.
+        The same file can be shared among several workflows,
+        to learn from their past runs.
+
+        Keyword arguments
+        -----------------
+
+        fname : str
+            Name of the file in which the runs are recorded.
+            Default is '.cost_model.json' in the workflow directory.
+
+        """
+        if fname is None:
+            fname = os.path.join(self.dirname, '.cost_model.json')
+        from .costmodel import CostModel
+        self.cost_model = CostModel(fname)
+
+    def _record_cost(self, task):
+        if (self.cost_model is not None
+            and task.get_status() == self._STATUS_COMPLETED):
+            self.cost_model.add_task(task)
+
+    def flush_cost_model(self):
+        """Write the new runs of the cost model to disk, if any."""
+        if self.cost_model is not None:
+            self.cost_model.flush()
+
+    def set_results_store(self, fname=None):
+        """
+        Attach a ResultsStore to the workflow, in which the results
+        of the tasks are collected by harvest_results.
+
+        Keyword arguments
+        -----------------
+
+        fname : str
+            Name of the store file.
+            Default is 'results.npz' in the workflow directory.
+
+        """
+        if fname is None:
+            fname = os.path.join(self.dirname, 'results.npz')
+        from .results import ResultsStore
+        self.results_store = ResultsStore(fname)
+
+    def harvest_results(self, nthreads=1):
+        """
+        Collect the input variables, status and results of every task
+        of the workflow and sub-workflows into the results store,
+        then save it and return it. Only the tasks whose input or output
+        changed since the last harvest are parsed.
+
+        Keyword arguments
+        -----------------
+
+        nthreads : int (1)
+            Number of threads parsing the tasks concurrently.
+
+        """
+        if self.results_store is None:
+            self.set_results_store()
+
+        try:
+            if self.results_store.harvest(self, nthreads=nthreads):
+                self.results_store.save()
+        finally:
+            self.flush_status_cache()
+
+        return self.results_store
+
+    def get_timings(self):
+        """
+        Return the timing of every task of the workflow and sub-workflows,
+        in an OrderedDict indexed by task. See Task.get_timing.
+        """
+        return OrderedDict((task, task.get_timing()) for task in self)
+
+    def get_timing(self):
+        """
+        Return the timing of the workflow, summed over its tasks.
+        See io.timing.aggregate_timings.
+        """
+        from ..io.timing import aggregate_timings
+        return aggregate_timings(self.get_timings().values())
 
     def run_and_report(self, *args, **kwargs):
         """
@@ -162,14 +449,379 @@ class Workflow(Task):
         """
         Run each task that does not reports a completed status, then report its status.
         It is not strictly equivalent to run() because the workflow's runscriptd
+
+        Keyword arguments
+        -----------------
+
+        restart : bool (False)
+            Restart the unfinished tasks that can be restarted
+            (see AbinitTask.restart). The other ones are run from scratch.
+
+        Other arguments are passed to the report of each task.
         """
+        restart = kwargs.pop('restart', False)
         for task in self.tasks:
             if 'run_and_report_incomplete' in dir(task):
-                task.run_and_report_incomplete(*args, **kwargs)
+                task.run_and_report_incomplete(*args, restart=restart, **kwargs)
             else:
-                task.run_if_incomplete()
+                if restart and 'restart' in dir(task):
+                    task.run_if_incomplete(restart=True)
+                else:
+                    task.run_if_incomplete()
                 task.report(*args, **kwargs)
 
+    def set_packing(self, ncores, fname='packed.sh', launcher=None,
+                    incomplete_only=False, dependencies=True, **kwargs):
+        """
+        Pack the tasks into a single allocation script, written along
+        with the workflow, which executes many tasks concurrently
+        within an allocation of ncores cores. See PackedScript.
+        With a cost model (see set_cost_model), the longest tasks
+        are started first.
+
+        Arguments
+        ---------
+
+        ncores : int
+            Number of cores of the allocation.
+            Each MPI task occupies nproc cores.
+
+        Keyword arguments
+        -----------------
+
+        fname : str ('packed.sh')
+            Name of the allocation script, in the workflow directory.
+        launcher : str (None)
+            Command prefixed to the execution of the run script of a task,
+            e.g. 'taskset -c $PACK_CORES'. See PackedScript.
+        incomplete_only : bool (False)
+            Only pack the tasks that do not report a completed status
+            when the workflow is written.
+        dependencies : bool (True)
+            Infer the dependencies between tasks from their links.
+            If False, the tasks are assumed to be independent.
+
+        Any other keyword argument is passed to PackedScript,
+        e.g. header to make the script a submission file.
+
+        """
+        from .packing import PackedScript
+        self.packed_script = PackedScript(ncores, launcher=launcher, **kwargs)
+        self.packed_script.fname = fname
+        self._packing_options = dict(incomplete_only=incomplete_only,
+                                     dependencies=dependencies)
+
+    def _write_packed_script(self, summary):
+        from .dependencies import TaskGraph
+
+        options = self._packing_options
+        tasks = list(self)
+        graph = TaskGraph(tasks) if options['dependencies'] else None
+        tasks = self._restore_from_cache(tasks)
+        if options['incomplete_only']:
+            tasks = [task for task in tasks if not task.is_complete()]
+
+        cost = self.cost_model.predict if self.cost_model is not None else None
+
+        self.packed_script.set_tasks(self.dirname, tasks, graph=graph,
+                                     cost=cost)
+        fname = os.path.join(self.dirname, self.packed_script.fname)
+        summary.add(fname, self.packed_script.write(fname))
+
+    def run_packed(self, report=True, **kwargs):
+        """
+        Execute the allocation script on the local machine,
+        standing in for a batch allocation, and return its exit code.
+        The script must have been written (see set_packing and write).
+
+        Keyword arguments
+        -----------------
+
+        report : bool (True)
+            Report the status of each task once the script has finished.
+            Any other keyword argument is passed to the report function.
+
+        """
+        if self.packed_script is None:
+            raise Exception('No packing mode set. Use set_packing first.')
+
+        try:
+            returncode = self.packed_script.run(cwd=self.dirname)
+            for task in self:
+                self._record_cost(task)
+                if report:
+                    task.report(**kwargs)
+        finally:
+            self._store_in_cache(list(self))
+            self.flush_status_cache()
+            self.flush_cost_model()
+
+        return returncode
+
+    def get_exit_statuses(self):
+        """
+        Return the exit status of the run script of each task executed
+        by the allocation script, in an OrderedDict indexed by task.
+        The status is None for the tasks that did not finish.
+        """
+        from .packing import read_exit_status
+        return OrderedDict((task, read_exit_status(task)) for task in self)
+
+    def set_job_array(self, fname='array.sh', index_fname='tasks.index',
+                      incomplete_only=False, **kwargs):
+        """
+        Write, along with the workflow, a job-array submission script
+        executing one task per array element, and an index file mapping
+        each array index to a task directory. See ArrayScript.
+        All the tasks of the array request the same resources,
+        as declared in the header of the script. The tasks must not depend
+        on each other: an exception is raised when the workflow is written
+        otherwise. Use set_packing for dependent tasks.
+        With max_size, an array exceeding max_size elements is split
+        into several scripts, e.g. 'array_1.sh', 'array_2.sh', ...
+
+        Keyword arguments
+        -----------------
+
+        fname : str ('array.sh')
+            Name of the submission script, in the workflow directory.
+        index_fname : str ('tasks.index')
+            Name of the index file, in the workflow directory.
+        incomplete_only : bool (False)
+            Only include the tasks that do not report a completed status
+            when the workflow is written.
+
+        Any other keyword argument is passed to ArrayScript,
+        e.g. scheduler, header and max_size.
+
+        """
+        from .jobarray import ArrayScript
+        self.array_script = ArrayScript(index_fname=index_fname, **kwargs)
+        self.array_script.fname = fname
+        self._array_scripts = [self.array_script]
+        self._array_options = dict(incomplete_only=incomplete_only)
+
+    def _write_array_script(self, summary):
+        from .dependencies import TaskGraph
+
+        tasks = self._restore_from_cache(list(self))
+        if self._array_options['incomplete_only']:
+            tasks = [task for task in tasks if not task.is_complete()]
+
+        graph = TaskGraph(list(self))
+        included = set(tasks)
+        for task in tasks:
+            if any(parent in included for parent in graph.get_parents(task)):
+                raise Exception(
+                    'The tasks of a job array must be independent, but\n' +
+                    task.dirname + '\ndepends on another task of the array.' +
+                    ' Use set_packing instead.')
+
+        self.array_script.set_tasks(self.dirname, tasks)
+        self._array_scripts = self.array_script.split()
+        if len(self._array_scripts) > 1:
+            root, ext = os.path.splitext(self.array_script.fname)
+            for i, script in enumerate(self._array_scripts):
+                script.fname = '{}_{}{}'.format(root, i + 1, ext)
+
+        self._remove_stale_array_scripts()
+        for script in self._array_scripts:
+            fname = os.path.join(self.dirname, script.fname)
+            summary.add(fname, script.write(fname))
+        fname = os.path.join(self.dirname, self.array_script.index_fname)
+        summary.add(fname, self.array_script.write_index(fname))
+
+    def _remove_stale_array_scripts(self):
+        """
+        Remove the array scripts left by a previous write, i.e. the unsplit
+        script once the array is split, and the chunks no longer needed.
+        """
+        import re
+        root, ext = os.path.splitext(
+            os.path.join(self.dirname, self.array_script.fname))
+        dirname, root = os.path.split(root)
+        if not os.path.isdir(dirname):
+            return
+        regex = re.compile(re.escape(root) + r'(?:_\d+)?' + re.escape(ext) + '$')
+        current = set(os.path.normpath(script.fname)
+                      for script in self._array_scripts)
+        for fname in os.listdir(dirname):
+            path = os.path.join(dirname, fname)
+            if (regex.match(fname) and
+                os.path.relpath(path, self.dirname) not in current):
+                os.remove(path)
+
+    def submit_array(self, command='sbatch'):
+        """
+        Submit the job-array scripts from the workflow directory,
+        and return the exit code of the submission command.
+        When the array is split, the scripts are submitted in order,
+        until a submission fails.
+        The status of the tasks is then given by get_status or report.
+        """
+        if self.array_script is None:
+            raise Exception('No job array set. Use set_job_array first.')
+        for script in self._array_scripts:
+            returncode = script.submit(cwd=self.dirname, command=command)
+            if returncode:
+                return returncode
+        return 0
+
+    def run_array(self, nthreads=None, report=True, **kwargs):
+        """
+        Execute the elements of the job array in parallel on the local
+        machine, standing in for the batch scheduler.
+        The scripts of a split array are executed one after the other.
+        Returns the exit code of each element, in a list.
+
+        Keyword arguments
+        -----------------
+
+        nthreads : int (None)
+            Number of elements executed in parallel.
+            Default is the number of cores of the machine.
+        report : bool (True)
+            Report the status of each task once all have finished.
+            Any other keyword argument is passed to the report function.
+
+        """
+        if self.array_script is None:
+            raise Exception('No job array set. Use set_job_array first.')
+
+        try:
+            returncodes = list()
+            for script in self._array_scripts:
+                returncodes.extend(script.run_local(cwd=self.dirname,
+                                                    nthreads=nthreads))
+            for task in self:
+                self._record_cost(task)
+                if report:
+                    task.report(**kwargs)
+        finally:
+            self._store_in_cache(list(self))
+            self.flush_status_cache()
+            self.flush_cost_model()
+
+        return returncodes
+
+    def get_task_graph(self):
+        """
+        Return the dependency graph of the tasks, inferred from the files
+        that each task links or copies from the directory of another task.
+        The tasks of sub-workflows are included individually.
+        """
+        from .dependencies import TaskGraph
+        return TaskGraph(self)
+
+    def run_concurrently(self, ncores=None, report=True, incomplete_only=False,
+                         dependencies=True, **kwargs):
+        """
+        Run the tasks concurrently, within a budget of cores,
+        and report the status of each task as soon as it finishes.
+        The tasks of sub-workflows are executed individually.
+        A task is started as soon as the tasks it depends on have completed,
+        and is skipped if any of them fails to complete.
+        With a cost model (see set_cost_model), the longest tasks
+        are started first.
+
+        Keyword arguments
+        -----------------
+
+        ncores : int (None)
+            Total number of cores available to the tasks.
+            Default is the number of cores of the machine.
+            Each MPI task occupies nproc cores.
+        report : bool (True)
+            Report the status of each task as soon as it finishes.
+            Any other keyword argument is passed to the report function.
+        incomplete_only : bool (False)
+            Only run the tasks that do not report a completed status.
+        dependencies : bool (True)
+            Infer the dependencies between tasks from their links.
+            If False, the tasks are assumed to be independent.
+
+        """
+        from .dependencies import TaskGraph
+        from .executor import TaskExecutor
+
+        tasks = list(self)
+        graph = TaskGraph(tasks) if dependencies else None
+        if incomplete_only:
+            tasks = [task for task in tasks if not task.is_complete()]
+
+        def callback(task):
+            self._record_cost(task)
+            if report:
+                task.report(**kwargs)
+
+        cost = self.cost_model.predict if self.cost_model is not None else None
+
+        executor = TaskExecutor(ncores)
+        try:
+            executor.run(tasks, callback=callback, graph=graph, cost=cost)
+        finally:
+            self.flush_status_cache()
+            self.flush_cost_model()
+
+    def arun(self, max_concurrency=None, timeout=None, poll_interval=None,
+             on_status=None, report=True, incomplete_only=False,
+             dependencies=True, **kwargs):
+        """
+        Return a coroutine that runs the tasks concurrently
+        with asyncio subprocesses, e.g.
+
+            >>> asyncio.run(workflow.arun(max_concurrency=16, timeout=3600))
+
+        The tasks of sub-workflows are executed individually.
+        A task is started as soon as the tasks it depends on have completed,
+        and is skipped if any of them fails to complete.
+        With a cost model (see set_cost_model), the longest tasks
+        are started first.
+        Cancelling the coroutine terminates all running executions.
+
+        Keyword arguments
+        -----------------
+
+        max_concurrency : int (None)
+            Maximum number of tasks running at the same time.
+            Default is no limit.
+        timeout : float (None)
+            Wall-clock time limit of each task, in seconds.
+        poll_interval : float (None)
+            Interval, in seconds, between status checks of running tasks.
+        on_status : function (None)
+            Function called as on_status(task, status) after each check.
+        report : bool (True)
+            Report the status of each task as soon as it finishes.
+            Any other keyword argument is passed to the report function.
+        incomplete_only : bool (False)
+            Only run the tasks that do not report a completed status.
+        dependencies : bool (True)
+            Infer the dependencies between tasks from their links.
+            If False, the tasks are assumed to be independent.
+
+        """
+        from .asyncrunner import arun_tasks
+        from .dependencies import TaskGraph
+
+        tasks = list(self)
+        graph = TaskGraph(tasks) if dependencies else None
+        if incomplete_only:
+            tasks = [task for task in tasks if not task.is_complete()]
+
+        def callback(task):
+            self._record_cost(task)
+            if report:
+                task.report(**kwargs)
+            self.flush_status_cache()
+            self.flush_cost_model()
+
+        cost = self.cost_model.predict if self.cost_model is not None else None
+
+        return arun_tasks(tasks, max_concurrency=max_concurrency, graph=graph,
+                          callback=callback, cost=cost, timeout=timeout,
+                          poll_interval=poll_interval, on_status=on_status)
+
     def clear_tasks(self):
         del self.tasks[:]
 
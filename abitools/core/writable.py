@@ -1,16 +1,120 @@
+import os
 from collections import OrderedDict
 
-__all__ = ['Writable', 'BasicFile', 'BasicInputFile']
+__all__ = ['Writable', 'BasicFile', 'BasicInputFile',
+           'WriteSummary', 'write_if_changed']
+
+_CREATED = 'created'
+_UPDATED = 'updated'
+_UNCHANGED = 'unchanged'
+
+
+def _encode(chunk):
+    if not isinstance(chunk, bytes):
+        chunk = chunk.encode('utf-8')
+    return chunk
+
+
+def write_if_changed(fname, content):
+    """
+    Write content to a file, unless the file already holds that content,
+    in which case the file and its modification time are left untouched.
+
+    The content is either a string, or a function returning an iterable
+    of strings. In the latter case, the content is streamed to the file
+    and is never held in memory as a whole.
+    The content is rendered only once: it is compared with the file
+    as it is rendered, and the file is overwritten from the first
+    difference onward.
+
+    Returns 'created', 'updated' or 'unchanged'.
+    """
+    chunks = iter(content() if callable(content) else (content,))
+
+    if not os.path.exists(fname):
+        with open(fname, 'wb') as f:
+            f.writelines(_encode(chunk) for chunk in chunks)
+        return _CREATED
+
+    with open(fname, 'rb') as f:
+        for chunk in chunks:
+            chunk = _encode(chunk)
+            position = f.tell()
+            if f.read(len(chunk)) != chunk:
+                break
+        else:
+            position = f.tell()
+            if not f.read(1):
+                return _UNCHANGED
+            chunk = b''
+
+    with open(fname, 'r+b') as f:
+        f.seek(position)
+        f.write(chunk)
+        f.writelines(_encode(chunk) for chunk in chunks)
+        f.truncate()
+
+    return _UPDATED
+
+
+class WriteSummary(OrderedDict):
+    """
+    Files written by a write() call, with the action taken for each of them:
+    'created', 'updated' or 'unchanged'.
+    """
+
+    _precedence = (_UNCHANGED, _UPDATED, _CREATED)
+
+    def add(self, fname, state):
+        """
+        Record the action taken for a file. When a file is written
+        several times, the summary keeps the most significant action.
+        """
+        if fname in self:
+            state = max(state, self[fname], key=self._precedence.index)
+        self[fname] = state
+
+    def merge(self, other):
+        """Record the actions of another summary."""
+        for fname, state in other.items():
+            self.add(fname, state)
+
+    def _get_files(self, state):
+        return [fname for fname, value in self.items() if value == state]
+
+    @property
+    def created(self):
+        return self._get_files(_CREATED)
+
+    @property
+    def updated(self):
+        return self._get_files(_UPDATED)
+
+    @property
+    def unchanged(self):
+        return self._get_files(_UNCHANGED)
+
+    def __str__(self):
+        return '{} created, {} updated, {} unchanged'.format(
+            len(self.created), len(self.updated), len(self.unchanged))
+
 
 class Writable(object):
 
     def __init__(self, fname=None):
         self.fname = fname
 
+    def iter_chunks(self):
+        """Iterate over successive pieces of the file content."""
+        yield str(self)
+
     def write(self, fname=None):
+        """
+        Write the file, unless it already holds the same content.
+        Returns 'created', 'updated' or 'unchanged'.
+        """
         fname = fname if fname else self.fname
-        with open(fname, 'w') as f:
-            f.write(str(self))
+        return write_if_changed(fname, self.iter_chunks)
 
 
 class BasicFile(Writable):
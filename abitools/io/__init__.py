@@ -2,6 +2,12 @@
 from . import variable
 from . import sorting
 from . import structures
+from . import inputparser
+from . import timing
+from . import autoparal
 
 from .abinitinput import *
 from .anaddbinput import *
+from .abinitoutput import *
+from .timing import *
+from .autoparal import *
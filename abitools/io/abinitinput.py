@@ -1,11 +1,19 @@
 from __future__ import print_function, division
 import textwrap
-import numpy as np
+from bisect import bisect_left
+from functools import reduce
+from operator import attrgetter, mul
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # Py2
+    from collections import MutableMapping
 
 from ..utils import listify, angstrom_to_bohr, header_line
 from ..core.writable import Writable
-from .sorting import input_variable_blocks
+from .sorting import input_variable_blocks, input_variable_sections
 from .variable import InputVariable
+from .inputparser import parse_variables
 from .structures import structure_to_abivars
 
 __all__ = ['AbinitInput']
@@ -53,23 +61,127 @@ class AbinitInput(Writable):
     >> f.set_variables(kpoint_grid_unshifted, dataset=[2, 3])
     >> 
     >> f.write('myfile.in')
+
+    For parameter sweeps, the common variables can be set once
+    in a template, which is frozen and shared by many inputs:
+
+    >> template = AbinitInput()
+    >> template.set_variables(cell)
+    >> template.freeze()
+    >> 
+    >> for ecut in range(10, 50, 5):
+    >>     f = AbinitInput(template=template)
+    >>     f.set_variable('ecut', ecut)
+
+    Each input only stores the variables it overrides, and the
+    declarations of the template variables are formatted only once.
     """
 
     _ndtset = 0
     _jdtset = None
     _udtset = None
 
-    def __init__(self, comment='', **kwargs):
+    _frozen = False
+    _template = None
+
+    def __init__(self, comment='', template=None, **kwargs):
+        """
+        Keyword arguments
+        -----------------
+
+        comment : str ('')
+            Comment written at the top of the input.
+        template : AbinitInput (None)
+            A frozen input providing the default variables.
+            Only the variables that are set afterward are stored.
+
+        """
 
         super(AbinitInput, self).__init__(**kwargs)
 
-        self.variables = dict()
-        self.decimals = dict()
-        self.comment = comment
-        self.dataset_comments = dict()
+        if template is None:
+            self.variables = dict()
+            self.decimals = dict()
+            self.comment = comment
+            self.dataset_comments = dict()
+            return
+
+        if not template.frozen:
+            raise Exception('Only a frozen AbinitInput can be used '
+                            'as a template. Use AbinitInput.freeze().')
+
+        self._template = template
+        self.variables = VariableOverlay(template.variables)
+        self.decimals = VariableOverlay(template.decimals)
+        self.comment = comment or template.comment
+        self.dataset_comments = VariableOverlay(template.dataset_comments)
+        self._ndtset = template._ndtset
+        self._jdtset = template._jdtset
+        self._udtset = template._udtset
+
+    @property
+    def frozen(self):
+        """True if the input can no longer be modified."""
+        return self._frozen
+
+    def freeze(self):
+        """
+        Make the input immutable, so that it can be shared
+        as a template by other inputs.
+        """
+        if self._frozen:
+            return
+        self.variables = FrozenVariables(self.variables)
+        self.decimals = FrozenVariables(self.decimals)
+        self.dataset_comments = FrozenVariables(self.dataset_comments)
+        self._template = None
+        self._rendered = dict()
+        self._frozen = True
+
+    def copy(self, **kwargs):
+        """
+        Return a modifiable copy of the input, with the same variables,
+        comments and datasets. The copy does not use a template.
+        Keyword arguments are passed to AbinitInput, e.g. fname.
+        """
+        kwargs.setdefault('fname', self.fname)
+        new = type(self)(comment=self.comment, **kwargs)
+        new.variables.update(self.variables)
+        new.decimals.update(self.decimals)
+        new.dataset_comments.update(self.dataset_comments)
+        new._ndtset = self._ndtset
+        new._jdtset = listify(self._jdtset) if self._jdtset else None
+        new._udtset = listify(self._udtset) if self._udtset else None
+        return new
+
+    def _check_not_frozen(self):
+        if self._frozen:
+            raise Exception('This AbinitInput is frozen. '
+                            'Create a new input with it as template.')
+
+    def get_input_variable(self, name, value):
+        """
+        Return the InputVariable object declaring a variable.
+        Variables inherited from a template are formatted only once.
+        """
+        if (self._template is not None and self.variables.inherits(name)
+            and not self.decimals.is_modified(name)):
+            return self._template.get_input_variable(name, value)
+
+        if not self._frozen:
+            return InputVariable(name, value,
+                                 decimals=self.decimals.get(name, 0))
+
+        variable = self._rendered.get(name)
+        if variable is None:
+            variable = RenderedVariable(name, value,
+                                        decimals=self.decimals.get(name, 0))
+            self._rendered[name] = variable
+        return variable
 
     def set_comment(self, comment, dataset=None):
         """Write a comment for the input or for one dataset."""
+        self._check_not_frozen()
         if not dataset:
             self.comment = comment
         else:
@@ -99,8 +211,7 @@ class AbinitInput(Writable):
         # Sort variables
         jdtset = list(self.jdtset) if self.jdtset else list()
         for name, value in self.variables.items():
-            variable = InputVariable(name, value,
-                                     decimals=self.decimals.get(name, 0))
+            variable = self.get_input_variable(name, value)
 
             j = variable.dataset
 
@@ -114,7 +225,7 @@ class AbinitInput(Writable):
                     # Create a new block if needed
                     block = VariableBlock('Dataset {}'.format(j))
                     block.comment = self.dataset_comments.get(j, '')
-                    i = np.searchsorted(jdtset, j)
+                    i = bisect_left(jdtset, j)
                     jdtset.insert(i, j)
                     datasets.insert(i, block)
 
@@ -142,10 +253,12 @@ class AbinitInput(Writable):
 
     def clear(self):
         """Clear variables."""
+        self._check_not_frozen()
         self.variables.clear()
 
     def set_variable(self, name, value, decimals=None):  # TODO ndecimal or ndigits 
         """Set a single variable."""
+        self._check_not_frozen()
 
         if name in ('ndtset', 'jdtset', 'udtset'):
             setattr(self, name, value)
@@ -172,8 +285,52 @@ class AbinitInput(Writable):
                 newkey = key + str(ds)
                 self.set_variable(newkey, val, **kwargs)
 
+    @classmethod
+    def from_string(cls, string, lenient=False, **kwargs):
+        """
+        Create an input from the content of an abinit input file.
+
+        Arguments
+        ---------
+
+        string : str
+            The content of the input file.
+
+        Keyword arguments
+        -----------------
+
+        lenient : bool (False)
+            Ignore the tokens that cannot be interpreted,
+            instead of raising a ValueError.
+
+        Any other keyword argument is passed to the constructor.
+        """
+        new = cls(**kwargs)
+        variables = parse_variables(string, lenient=lenient)
+
+        for name in ('ndtset', 'udtset', 'jdtset'):
+            value = variables.pop(name, None)
+            if value is not None:
+                setattr(new, name, value)
+
+        new.variables.update(variables)
+        return new
+
+    @classmethod
+    def from_file(cls, fname, lenient=False, **kwargs):
+        """
+        Create an input by reading an abinit input file.
+        See AbinitInput.from_string.
+        """
+        with open(fname, 'r') as f:
+            string = f.read()
+        return cls.from_string(string, lenient=lenient, **kwargs)
+
     def set_structure(self, structure):
-        """Use a pymatgen.Structure object to define the unit cell."""
+        """
+        Use a pymatgen.Structure object, or the name of a structure file,
+        to define the unit cell.
+        """
         variables = structure_to_abivars(structure)
         self.set_variables(variables)
 
@@ -183,6 +340,7 @@ class AbinitInput(Writable):
 
     @ndtset.setter
     def ndtset(self, value):
+        self._check_not_frozen()
         self._ndtset = int(value)
 
         if self._ndtset > 1 and not self.jdtset and not self.udtset:
@@ -194,7 +352,8 @@ class AbinitInput(Writable):
 
     @jdtset.setter
     def jdtset(self, value):
-        self._jdtset = map(int, listify(value))
+        self._check_not_frozen()
+        self._jdtset = list(map(int, listify(value)))
         self.ndtset = len(self._jdtset)
 
         if self.udtset:
@@ -206,8 +365,9 @@ class AbinitInput(Writable):
 
     @udtset.setter
     def udtset(self, value):
-        self._udtset = map(int, listify(value))
-        self.ndtset = np.prod(self._udtset)
+        self._check_not_frozen()
+        self._udtset = list(map(int, listify(value)))
+        self.ndtset = reduce(mul, self._udtset, 1)
 
         if self.jdtset:
             self._jdtset = None
@@ -216,6 +376,88 @@ class AbinitInput(Writable):
 # =========================================================================== #
 
 
+class FrozenVariables(dict):
+    """A dictionary of variables that cannot be modified."""
+
+    def _readonly(self, *args, **kwargs):
+        raise Exception('Variables of a frozen AbinitInput cannot be modified.')
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenVariables, (dict(self),))
+
+
+class VariableOverlay(MutableMapping):
+    """
+    Variables defined by a shared base mapping, which is never modified,
+    and by a small set of overrides. Deleted base variables are masked.
+    """
+
+    __slots__ = ('base', 'overrides', 'deleted')
+
+    def __init__(self, base):
+        self.base = base
+        self.overrides = dict()
+        self.deleted = frozenset()
+
+    def inherits(self, name):
+        """True if the variable is taken from the base."""
+        return not self.is_modified(name) and name in self.base
+
+    def is_modified(self, name):
+        """True if the variable is overridden or deleted."""
+        return name in self.overrides or name in self.deleted
+
+    def __getitem__(self, name):
+        if name in self.overrides:
+            return self.overrides[name]
+        if name in self.deleted:
+            raise KeyError(name)
+        return self.base[name]
+
+    def __setitem__(self, name, value):
+        self.overrides[name] = value
+        if name in self.deleted:
+            self.deleted = self.deleted - set([name])
+
+    def __delitem__(self, name):
+        if name in self.overrides:
+            del self.overrides[name]
+        elif name not in self.base or name in self.deleted:
+            raise KeyError(name)
+        if name in self.base:
+            self.deleted = self.deleted | set([name])
+
+    def __contains__(self, name):
+        return name in self.overrides or self.inherits(name)
+
+    def __iter__(self):
+        for name in self.base:
+            if name not in self.overrides and name not in self.deleted:
+                yield name
+        for name in self.overrides:
+            yield name
+
+    def __len__(self):
+        return len(set(self.base) - self.deleted | set(self.overrides))
+
+
+class RenderedVariable(InputVariable):
+    """An InputVariable whose declaration is formatted only once."""
+
+    _string = None
+
+    def __str__(self):
+        if self._string is None:
+            self._string = super(RenderedVariable, self).__str__()
+        return self._string
+
+
+# =========================================================================== #
+
+
 class VariableBlock(list):
     """A block of abinit variables."""
 
@@ -263,7 +505,7 @@ class VariableBlock(list):
 
         # Choose the iterator
         if self.sort:
-            variables = sorted(self)
+            variables = sorted(self, key=attrgetter('sorting_name'))
         else:
             variables = iter(self)
 
@@ -282,28 +524,29 @@ class SortedVariableBlock(VariableBlock):
         Sort variables into sections and return new variable blocks
         for each section.
         """
-        blocks = list()
-
-        for (name, register) in input_variable_blocks.items():
-
-            register = register.split()
+        sections = dict()
+        unsorted = list()
 
-            block = VariableBlock(name, header_size=self.header_size//2)
-
-            for i in reversed(range(len(self))):
-                variable = self[i]
-                if variable.basename in register:
-                    block.append(self.pop(i))
+        for variable in self:
+            section = input_variable_sections.get(variable.basename)
+            if section is None:
+                unsorted.append(variable)
+            else:
+                sections.setdefault(section, list()).append(variable)
 
-            if block:
+        blocks = list()
+        for name in input_variable_blocks:
+            if name in sections:
+                block = VariableBlock(name, header_size=self.header_size//2)
+                block.extend(sections[name])
                 blocks.append(block)
 
-        if self:
+        if unsorted:
             block = VariableBlock('Unsorted', header_size=self.header_size//2)
-            block.extend(self)
+            block.extend(unsorted)
             blocks.append(block)
 
-            self.clear()
+        self.clear()
 
         return blocks
 
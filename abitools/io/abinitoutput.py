@@ -0,0 +1,400 @@
+from __future__ import print_function, division
+import os
+import re
+import mmap
+import itertools
+from collections import OrderedDict
+
+from ..utils import lazy_import, iter_last_lines
+from .inputparser import parse_variables
+from .timing import read_timing, parse_nproc, parse_cpu_wall, get_efficiency
+
+np = lazy_import('numpy')
+
+__all__ = ['AbinitOutput']
+
+
+_DATASET_RE = re.compile(br'^ *== (?:DATASET +(\d+)|END DATASET)', re.M)
+_OUTVARS_RE = re.compile(
+    br'^ *-outvars: echo values of variables after computation', re.M)
+_OUTVARS_END_RE = re.compile(br'^ *(?:={5,}|-+ *[A-Za-z])')
+
+_ETOT_RE = re.compile(br'^ ETOT +\d+ +(\S+)')
+_ETOTAL_RE = re.compile(br'>>>>>>>>> Etotal= *(\S+)')
+_FERMI_RE = re.compile(br'Fermi \(or HOMO\) energy \(hartree\) = *(\S+)')
+_PRESSURE_RE = re.compile(br'Pressure= *(\S+) GPa')
+_FORCES_TAG = b'cartesian forces (hartree/bohr) at end:'
+_FORCE_LINE_RE = re.compile(br'^ +\d+ +(\S+) +(\S+) +(\S+) *$')
+
+# Number of lines read at the beginning and at the end of a dataset section
+# to find its number of processes and its times.
+_HEADER_NLINES = 20
+_TAIL_NLINES = 100
+
+# Conversion from hartree/bohr^3 to GPa
+_HA_BOHR3_TO_GPA = 29421.02648438959
+
+
+def _to_float(sval):
+    return float(sval.replace(b'D', b'E').replace(b'd', b'e'))
+
+
+class AbinitOutput(object):
+    """
+    Main output file of abinit.
+
+    The file is indexed in a single pass over a memory map, recording the
+    offsets of the dataset sections and of the final echo of the variables.
+    Results are then extracted lazily, by streaming the lines of the relevant
+    section, so that memory use does not depend on the size of the file.
+
+    Example usage:
+
+    >> output = AbinitOutput('calc.out')
+    >> output.datasets
+    [1, 2]
+    >> output.get_dataset_results(2)['etotal']
+    -8.8661434670375
+    >> output.get_array('etotal')
+    array([-8.86614347, -8.86615012])
+    """
+
+    def __init__(self, fname):
+        """
+        Arguments
+        ---------
+
+        fname : str
+            Name of the main output file.
+
+        """
+        self.fname = fname
+        self._sections = None
+        self._outvars_section = None
+        self._outvars = None
+        self._results = dict()
+        self._timings = dict()
+
+    def index(self):
+        """Build the offset index of the sections of the file."""
+        sections = OrderedDict()
+        outvars_section = None
+
+        size = os.path.getsize(self.fname)
+        if size:
+            with open(self.fname, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    dataset, start, end = None, 0, size
+                    for match in _DATASET_RE.finditer(data):
+                        if dataset is not None:
+                            sections[dataset] = (start, match.start())
+                        if match.group(1) is None:
+                            dataset, end = None, match.start()
+                            break
+                        dataset = int(match.group(1))
+                        start = match.start()
+
+                    if dataset is not None:
+                        sections[dataset] = (start, size)
+
+                    else:
+                        match = _OUTVARS_RE.search(data, end)
+                        if match:
+                            outvars_section = (match.end(), size)
+
+                finally:
+                    data.close()
+
+        self._sections = sections
+        self._outvars_section = outvars_section
+
+    @property
+    def sections(self):
+        """Byte offsets (start, end) of each dataset section."""
+        if self._sections is None:
+            self.index()
+        return self._sections
+
+    @property
+    def datasets(self):
+        """Indices of the datasets found in the file."""
+        return list(self.sections.keys())
+
+    @property
+    def completed(self):
+        """True if the final echo of the variables was found."""
+        if self._sections is None:
+            self.index()
+        return self._outvars_section is not None
+
+    def iter_lines(self, dataset):
+        """Iterate over the lines of a dataset section, as bytes."""
+        start, end = self.sections[dataset]
+        with open(self.fname, 'rb') as f:
+            f.seek(start)
+            position = start
+            while position < end:
+                line = f.readline()
+                if not line:
+                    break
+                position += len(line)
+                yield line
+
+    def get_outvars(self):
+        """
+        Return the variables echoed by abinit after the computation,
+        as parsed by inputparser.parse_variables.
+        """
+        if self._outvars is not None:
+            return self._outvars
+
+        self._outvars = OrderedDict()
+        if not self.completed:
+            return self._outvars
+
+        start, end = self._outvars_section
+        lines = list()
+        with open(self.fname, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if _OUTVARS_END_RE.match(line):
+                    break
+                lines.append(line.decode('ascii', 'replace'))
+
+        self._outvars = parse_variables(''.join(lines), lenient=True)
+        return self._outvars
+
+    def get_final_variable(self, name, dataset):
+        """
+        Return the value of a variable echoed after the computation
+        for a given dataset, with units removed. None if not found.
+        """
+        outvars = self.get_outvars()
+        value = outvars.get(name + str(dataset), outvars.get(name))
+        if isinstance(value, list) and isinstance(value[-1], str):
+            value = value[:-1]
+        return value
+
+    def _scan_dataset(self, dataset):
+        """Extract the results from the lines of a dataset section."""
+        etot = list()
+        etotal = None
+        fermie = None
+        pressure = None
+        forces = None
+        reading_forces = False
+
+        for line in self.iter_lines(dataset):
+
+            if reading_forces:
+                match = _FORCE_LINE_RE.match(line)
+                if match:
+                    forces.append([_to_float(v) for v in match.groups()])
+                    continue
+                reading_forces = False
+
+            if line.startswith(b' ETOT'):
+                match = _ETOT_RE.match(line)
+                if match:
+                    etot.append(_to_float(match.group(1)))
+
+            elif b'Etotal=' in line:
+                match = _ETOTAL_RE.search(line)
+                if match:
+                    etotal = _to_float(match.group(1))
+
+            elif b'Fermi' in line:
+                match = _FERMI_RE.search(line)
+                if match:
+                    fermie = _to_float(match.group(1))
+
+            elif b'Pressure=' in line:
+                match = _PRESSURE_RE.search(line)
+                if match:
+                    pressure = _to_float(match.group(1))
+
+            elif _FORCES_TAG in line:
+                forces = list()
+                reading_forces = True
+
+        return etot, etotal, fermie, pressure, forces
+
+    def get_dataset_results(self, dataset):
+        """
+        Return the results of a dataset in a dict with the entries
+
+            etotal : float
+                Total energy (Ha).
+            etot_history : numpy.ndarray
+                Total energy at each SCF iteration (Ha).
+            scf_iterations : int
+                Number of SCF iterations.
+            fermie : float
+                Fermi energy, or HOMO (Ha).
+            pressure : float
+                Pressure (GPa).
+            fcart : numpy.ndarray, shape (natom, 3)
+                Final cartesian forces (Ha/bohr).
+            acell : numpy.ndarray, shape (3,)
+                Final cell lengths (bohr).
+            rprim : numpy.ndarray, shape (3, 3)
+                Final primitive vectors.
+            xred : numpy.ndarray, shape (natom, 3)
+                Final reduced coordinates.
+
+        Values that are not found are None.
+        """
+        if dataset in self._results:
+            return self._results[dataset]
+
+        etot, etotal, fermie, pressure, forces = self._scan_dataset(dataset)
+
+        if etotal is None:
+            etotal = self.get_final_variable('etotal', dataset)
+            if etotal is None and etot:
+                etotal = etot[-1]
+
+        if pressure is None:
+            strten = self.get_final_variable('strten', dataset)
+            if strten is not None:
+                pressure = - float(np.mean(strten[:3])) * _HA_BOHR3_TO_GPA
+
+        if forces is None:
+            forces = self.get_final_variable('fcart', dataset)
+
+        results = dict(
+            etotal=etotal,
+            etot_history=np.array(etot, dtype=float),
+            scf_iterations=len(etot),
+            fermie=fermie,
+            pressure=pressure,
+            fcart=self._get_vectors(forces),
+            acell=self._get_vectors(
+                self.get_final_variable('acell', dataset), shape=(3,)),
+            rprim=self._get_vectors(
+                self.get_final_variable('rprim', dataset), shape=(3, 3)),
+            xred=self._get_vectors(self.get_final_variable('xred', dataset)),
+            )
+
+        self._results[dataset] = results
+        return results
+
+    def get_dataset_timing(self, dataset):
+        """
+        Return the timing of a dataset in a dict with the entries
+
+            nproc : int
+                Number of MPI processes, from the header of the dataset.
+            cpu_time : float
+                CPU time of the dataset (sec).
+            wall_time : float
+                Wall-clock time of the dataset (sec).
+
+        Only the header and the tail of the section are read.
+        The times are the last cpu and wall times printed in the tail,
+        or else in the header. Values that are not found are None.
+        """
+        if dataset in self._timings:
+            return self._timings[dataset]
+
+        timing = dict(nproc=None, cpu_time=None, wall_time=None)
+
+        header_times = None
+        for line in itertools.islice(self.iter_lines(dataset), _HEADER_NLINES):
+            line = line.decode('ascii', 'replace')
+            if timing['nproc'] is None:
+                timing['nproc'] = parse_nproc(line)
+            if 'wall=' in line:
+                header_times = parse_cpu_wall(line) or header_times
+
+        times = None
+        start, end = self.sections[dataset]
+        for line in iter_last_lines(self.fname, _TAIL_NLINES,
+                                    start=start, end=end):
+            if 'wall=' in line:
+                times = parse_cpu_wall(line)
+                if times is not None:
+                    break
+
+        times = times or header_times
+        if times is not None:
+            timing['cpu_time'], timing['wall_time'] = times
+
+        self._timings[dataset] = timing
+        return timing
+
+    def get_timing(self):
+        """
+        Return the timing of the run in a dict with the entries
+
+            cpu_time : float
+                CPU time summed over the processes (sec).
+            wall_time : float
+                Wall-clock time (sec).
+            nproc : int
+                Number of MPI processes actually used.
+            efficiency : float
+                Parallel efficiency, cpu_time / (nproc * wall_time).
+            datasets : OrderedDict
+                Timing of each dataset, see get_dataset_timing.
+
+        The overall times are read from the end of the file.
+        Values that are not found are None.
+        """
+        timing = dict(cpu_time=None, wall_time=None, nproc=None,
+                      efficiency=None)
+        timing.update(read_timing(self.fname))
+
+        timing['datasets'] = OrderedDict(
+            (dataset, self.get_dataset_timing(dataset))
+            for dataset in self.datasets)
+
+        nprocs = [t['nproc'] for t in timing['datasets'].values()
+                  if t['nproc'] is not None]
+        if nprocs:
+            timing['nproc'] = max(nprocs)
+
+        timing['efficiency'] = get_efficiency(timing)
+        return timing
+
+    @staticmethod
+    def _get_vectors(values, shape=(-1, 3)):
+        """Convert a list of values into an array, or return None."""
+        if values is None:
+            return None
+        return np.array(values, dtype=float).reshape(shape)
+
+    def get_results(self):
+        """Return the results of all datasets, in an OrderedDict."""
+        return OrderedDict((dataset, self.get_dataset_results(dataset))
+                           for dataset in self.datasets)
+
+    def get_array(self, name):
+        """
+        Return a result for all datasets, stacked in a numpy array.
+        Missing values are replaced by nan.
+
+        Arguments
+        ---------
+
+        name : str
+            Name of the result, e.g. 'etotal', 'fermie' or 'fcart'.
+            See get_dataset_results.
+
+        """
+        values = [self.get_dataset_results(dataset)[name]
+                  for dataset in self.datasets]
+
+        shapes = set(np.shape(v) for v in values if v is not None)
+        if len(shapes) > 1:
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            return array
+
+        shape = shapes.pop() if shapes else ()
+        array = np.full((len(values),) + shape, np.nan)
+        for i, value in enumerate(values):
+            if value is not None:
+                array[i] = value
+        return array
@@ -1,6 +1,5 @@
 from __future__ import print_function, division
 import textwrap
-import numpy as np
 
 from ..utils import listify 
 from ..core.writable import Writable
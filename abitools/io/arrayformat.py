@@ -0,0 +1,167 @@
+from __future__ import print_function, division
+
+from ..utils import lazy_import
+
+np = lazy_import('numpy')
+
+__all__ = ['format_list', 'format_list2d']
+
+# Below this number of values, the element-wise formatter is used.
+VECTORIZE_MIN_SIZE = 32
+
+
+def _get_fraction_length(values):
+    """
+    Return len(str(f - int(f))) for each float f of an array.
+    The representation is computed once per distinct fraction.
+    """
+    truncated = np.trunc(values) + 0.  # Turns -0. into 0., like int() does.
+    fractions = values - truncated
+
+    # Distinguish 0. from -0. by comparing the bit patterns.
+    bits, inverse = np.unique(fractions.view(np.int64), return_inverse=True)
+    lengths = np.fromiter(map(len, map(str, bits.view(np.float64).tolist())),
+                          dtype=int, count=len(bits))
+
+    return lengths[inverse.reshape(-1)]
+
+
+def _use_fixed_point(values):
+    """True for the values that are formatted in fixed-point notation."""
+    absolute = np.abs(values)
+    return (values == 0) | ((absolute > 1e-3) & (absolute < 1e4))
+
+
+def _format_floats(values, floatdecimal=0):
+    """Vectorized InputVariable.format_scalar for an array of floats."""
+    ndec = np.maximum(_get_fraction_length(values) - 2, floatdecimal)
+    ndec = np.minimum(ndec, 16)
+
+    fixed = _use_fixed_point(values)
+
+    strings = np.empty(len(values), dtype=object)
+    for form, addlen, mask in (('f', 5, fixed), ('e', 8, ~fixed)):
+        for p in np.unique(ndec[mask]):
+            indices = np.flatnonzero(mask & (ndec == p))
+            spec = '%{}.{}{}'.format(p + addlen, p, form)
+            formatted = [spec % v for v in values[indices].tolist()]
+            if form == 'e':
+                formatted = [sval.replace('e', 'd') for sval in formatted]
+            strings[indices] = formatted
+
+    return strings
+
+
+def _format_scalars(values, floatdecimal=0):
+    """
+    Vectorized InputVariable.format_scalar over a list or a 1D array.
+    Returns None if the values are not all integers or finite floats.
+    """
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind in 'iu':
+            if floatdecimal == 0:
+                return values.astype(str).astype(object)
+            is_int = np.zeros(len(values), dtype=bool)
+        elif values.dtype.kind == 'f':
+            is_int = np.zeros(len(values), dtype=bool)
+        else:
+            return None
+        try:
+            floats = values.astype(np.float64)
+        except (ValueError, OverflowError):
+            return None
+
+    else:
+        types = [type(v) for v in values]
+        if not all(t is int or t is float for t in types):
+            return None
+        is_int = np.array([t is int for t in types], dtype=bool)
+        if floatdecimal != 0:
+            is_int[:] = False
+        try:
+            floats = np.array([float(v) for v in values], dtype=np.float64)
+        except OverflowError:
+            return None
+
+    if not np.all(np.isfinite(floats[~is_int])):
+        return None
+
+    strings = np.empty(len(values), dtype=object)
+    if is_int.any():
+        strings[is_int] = [str(values[i]) for i in np.flatnonzero(is_int)]
+    if not is_int.all():
+        strings[~is_int] = _format_floats(floats[~is_int], floatdecimal)
+
+    return strings
+
+
+def format_list(values, valperline=3, floatdecimal=0):
+    """
+    Vectorized InputVariable.format_list, with identical output.
+    Returns None if the values cannot be handled, e.g. strings.
+    """
+    strings = _format_scalars(values, floatdecimal)
+    if strings is None:
+        return None
+
+    strings = strings.tolist()
+    lines = [' ' + ' '.join(strings[i:i+valperline])
+             for i in range(0, len(strings), valperline)]
+
+    line = '\n'.join(lines)
+    if len(lines) > 1:
+        line = '\n' + line
+
+    return line
+
+
+def format_list2d(values, floatdecimal=0):
+    """
+    Vectorized InputVariable.format_list2d, with identical output.
+    Returns None if the values cannot be handled, e.g. strings,
+    or lists nested more than twice.
+    """
+    lengths = list()
+    flat = list()
+    for row in values:
+        lengths.append(len(row))
+        flat.extend(row)
+
+    if not flat:
+        return None
+
+    types = [type(v) for v in flat]
+    if not all(t is int or t is float for t in types):
+        return None
+
+    if all(t is int for t in types):
+        strings = [str(v) for v in flat]
+        width = max(len(s) for s in strings)
+        strings = [s.rjust(width) for s in strings]
+
+    else:
+        floats = np.array(flat, dtype=np.float64)
+        if not np.all(np.isfinite(floats)):
+            return None
+
+        # Integers have a fractional part of '0', hence no decimal.
+        is_int = np.array([t is int for t in types], dtype=bool)
+        fraction_length = _get_fraction_length(floats)
+        fraction_length[is_int] = 1
+        maxdec = fraction_length.max() - 2
+        ndec = min(max(maxdec, floatdecimal), 16)
+
+        if np.all(_use_fixed_point(floats)):
+            spec = '%{w}.{p}f'.format(w=ndec+5, p=ndec)
+        else:
+            spec = '%{w}.{p}e'.format(w=ndec+8, p=ndec)
+
+        strings = [spec % v for v in floats.tolist()]
+
+    lines = ['']
+    start = 0
+    for length in lengths:
+        lines.append(''.join(' ' + s for s in strings[start:start+length]))
+        start += length
+
+    return '\n'.join(lines).rstrip('\n')
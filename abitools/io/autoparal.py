@@ -0,0 +1,185 @@
+from __future__ import print_function, division
+import re
+
+from ..utils import JSONLinesIndex
+from .variable import InputVariable
+
+__all__ = ['read_autoparal', 'parse_autoparal', 'select_configuration',
+           'is_parallel_variable', 'AutoparalCache']
+
+
+# Document printed by abinit when autoparal is used with max_ncpus, e.g.
+#
+# --- !Autoparal
+# info:
+#     paral_kgb: 0
+#     max_ncpus: 4
+#     nkpt: 10
+# configurations:
+#     - tot_ncpus: 2
+#       mpi_ncpus: 2
+#       efficiency: 0.990
+#       mem_per_cpu: 1.23
+#       vars: {npimage: 1, npkpt: 2, npspinor: 1, npfft: 1, npband: 1, }
+# ...
+_START_RE = re.compile(r'^--- *!Autoparal')
+_END_RE = re.compile(r'^(?:\.\.\.|---)')
+_ITEM_RE = re.compile(r'^( *)(- +)?(\w+): *(.*?) *$')
+_FLOW_ITEM_RE = re.compile(r'(\w+) *: *([^,}]+)')
+
+# Parallelization variables that may be set by a configuration.
+PARALLEL_VARIABLES = ('npimage', 'npkpt', 'npspinor', 'npfft', 'npband',
+                      'bandpp', 'nphf', 'np_spkpt')
+
+
+def is_parallel_variable(name):
+    """
+    True if name is a parallelization variable, with or without
+    dataset index, e.g. 'npkpt', 'npkpt2', 'npband:' or 'npfft?'.
+    """
+    return InputVariable(name, None).basename in PARALLEL_VARIABLES
+
+
+def _to_value(sval):
+    sval = sval.strip()
+    for convert in (int, float):
+        try:
+            return convert(sval)
+        except ValueError:
+            pass
+    return sval
+
+
+def _parse_flow_mapping(sval):
+    """Parse an inline mapping, e.g. '{npkpt: 2, npband: 1, }'."""
+    return dict((key, _to_value(value))
+                for key, value in _FLOW_ITEM_RE.findall(sval))
+
+
+def parse_autoparal(lines):
+    """
+    Parse the first Autoparal document found in an iterable of lines.
+    Returns None if it is not found, or a dict with the entries
+
+        info : dict
+            Dimensions of the calculation, e.g. nkpt and mband.
+        configurations : list of dict
+            The suggested configurations, with the entries
+            tot_ncpus, mpi_ncpus, omp_ncpus, efficiency, mem_per_cpu,
+            and vars, the parallelization variables.
+
+    """
+    document = None
+    section = None
+    for line in lines:
+        line = line.rstrip()
+
+        if document is None:
+            if _START_RE.match(line):
+                document = dict(info=dict(), configurations=list())
+            continue
+
+        if _END_RE.match(line):
+            break
+
+        match = _ITEM_RE.match(line)
+        if not match:
+            continue
+        indent, dash, key, value = match.groups()
+
+        if not indent and not dash:
+            section = key
+            continue
+
+        if section == 'info':
+            document['info'][key] = _to_value(value)
+
+        elif section == 'configurations':
+            if dash:
+                document['configurations'].append(
+                    dict(omp_ncpus=1, vars=dict()))
+            if not document['configurations']:
+                continue
+            configuration = document['configurations'][-1]
+            if key == 'vars':
+                configuration['vars'] = _parse_flow_mapping(value)
+            else:
+                configuration[key] = _to_value(value)
+
+    return document
+
+
+def read_autoparal(fname):
+    """
+    Read the first Autoparal document printed in a log or output file
+    of abinit. See parse_autoparal.
+    """
+    with open(fname, 'r') as f:
+        return parse_autoparal(f)
+
+
+def select_configuration(configurations, max_ncpus=None, min_efficiency=.7):
+    """
+    Select the configuration giving the largest speedup,
+    i.e. efficiency * tot_ncpus, among those using at most max_ncpus
+    cores with an efficiency of at least min_efficiency.
+    If no configuration is efficient enough, the most efficient one
+    is selected. Among equivalent configurations, the one using
+    the fewest cores is selected. Returns None if no configuration fits.
+    """
+    candidates = list()
+    for configuration in configurations:
+        ncpus = configuration.get('tot_ncpus', configuration.get('mpi_ncpus'))
+        if not ncpus or (max_ncpus and ncpus > max_ncpus):
+            continue
+        efficiency = configuration.get('efficiency') or 0.
+        candidates.append((efficiency, ncpus, configuration))
+
+    if not candidates:
+        return None
+
+    efficient = [c for c in candidates if c[0] >= min_efficiency]
+    if efficient:
+        best = max(efficient, key=lambda c: (c[0] * c[1], -c[1]))
+    else:
+        best = max(candidates, key=lambda c: (c[0], -c[1]))
+
+    return best[2]
+
+
+class AutoparalCache(JSONLinesIndex):
+    """
+    Cache of the Autoparal documents, indexed by a hash of the input,
+    so that identical inputs are probed only once.
+
+    The documents are recorded in a JSON-lines file, one per line,
+    in which the last entry for a given key prevails.
+    Without file, the documents are only kept in memory.
+    See JSONLinesIndex.
+    """
+
+    def __init__(self, fname=None):
+        """
+        Keyword arguments
+        -----------------
+
+        fname : str (None)
+            Name of the file in which the documents are recorded.
+
+        """
+        super(AutoparalCache, self).__init__(fname)
+
+    def _get_entry_key(self, entry):
+        entry['autoparal']
+        return entry['key']
+
+    def get(self, key):
+        """Return the document of a key, or None."""
+        entry = self._get_entry(key)
+        if entry is None:
+            return None
+        return entry['autoparal']
+
+    def set(self, key, document):
+        """Record the document of a key."""
+        self._add_entry(dict(key=key, autoparal=document))
@@ -0,0 +1,198 @@
+from __future__ import print_function, division
+import re
+import math
+from collections import OrderedDict
+
+__all__ = ['parse_variables', 'parse_file']
+
+
+# Quoted strings, comments, and any other whitespace-separated word.
+_TOKEN_RE = re.compile(r'''"[^"]*"|'[^']*'|[#!][^\n]*|[^\s"'#!]+''')
+
+# Variable names, possibly followed by a dataset index such as 12, :, +, ?.
+_NAME_RE = re.compile(r'[A-Za-z][A-Za-z0-9_]*[0-9:+?]*$')
+
+_SQRT_RE = re.compile(r'([+-]?)sqrt\((.+)\)$', re.IGNORECASE)
+
+# Units recognized by abinit (case insensitive), with the spelling
+# under which they are stored.
+_UNITS = dict((unit.lower(), unit) for unit in (
+    'bohr', 'au', 'angstrom', 'angstr', 'hartree', 'Ha', 'eV', 'meV',
+    'Ry', 'Rydberg', 'K', 'T', 'Tesla', 'Sec', 'nm'))
+
+# Variables made of 3-vectors, which are reshaped into lists of lists.
+_VECTOR_VARIABLES = set(('rprim', 'xred', 'xcart', 'xangst', 'vel', 'kpt',
+                         'shiftk', 'shiftq', 'kptrlatt', 'qptrlatt', 'qpt',
+                         'kptbounds', 'qptbounds'))
+
+_DATASET_INDICES = '0123456789:+?'
+
+
+def _convert_number(token):
+    """Convert a string into an int or a float. Accepts d exponents."""
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return float(token.replace('d', 'e').replace('D', 'e'))
+
+
+def _convert_real(token):
+    """Convert a number, a fraction, or a square root into a number."""
+    if '/' in token:
+        num, den = token.split('/', 1)
+        return _convert_real(num) / _convert_real(den)
+
+    match = _SQRT_RE.match(token)
+    if match:
+        sign, arg = match.groups()
+        value = math.sqrt(_convert_real(arg))
+        return -value if sign == '-' else value
+
+    return _convert_number(token)
+
+
+def _convert_token(token):
+    """
+    Convert a value token into a list of values.
+    The repeat syntax n*value is expanded, while *value is kept as is,
+    since it only makes sense to abinit.
+    """
+    if '*' in token:
+        n, value = token.split('*', 1)
+        if not n:
+            return [token]
+        return int(n) * [_convert_real(value)]
+
+    return [_convert_real(token)]
+
+
+def _is_name(token):
+    return (token[0].isalpha() and token.lower() not in _UNITS
+            and not _SQRT_RE.match(token) and _NAME_RE.match(token))
+
+
+def _make_value(name, values):
+    """Return a scalar or a list, reshaped if needed."""
+    if len(values) == 1:
+        return values[0]
+
+    basename = name.rstrip(_DATASET_INDICES)
+    if basename in _VECTOR_VARIABLES:
+        if values[-1] in _UNITS.values():
+            nval = len(values) - 1
+        else:
+            nval = len(values)
+        if nval > 3 and nval % 3 == 0:
+            vectors = [values[i:i+3] for i in range(0, nval, 3)]
+            return vectors + values[nval:]
+
+    return values
+
+
+def parse_variables(string, lenient=False):
+    """
+    Parse the content of an abinit input file, and return the variables
+    in an OrderedDict.
+
+    The string is scanned in a single pass. Comments starting with
+    '#' or '!' are discarded, and dataset indices (such as ecut12,
+    ecut:, ecut+, ecut2?) are kept in the variable names.
+    Values are converted into int or float, including fractions (1/3),
+    square roots (sqrt(3)/2), d exponents (1.0d-8) and repetitions (3*0.5).
+    Units are appended to the values, as done by InputVariable.
+    Quoted strings are kept with their quotes, to be written back identically.
+
+    Arguments
+    ---------
+
+    string : str
+        The content of the input file.
+
+    Keyword arguments
+    -----------------
+
+    lenient : bool (False)
+        Ignore the tokens that cannot be interpreted, instead of
+        raising a ValueError.
+
+    """
+    variables = OrderedDict()
+    converted = dict()
+
+    name = None
+    values = list()
+
+    for token in _TOKEN_RE.findall(string):
+
+        first = token[0]
+        if first in '#!':
+            continue
+
+        if first in '"\'':
+            if name is None:
+                if not lenient:
+                    raise ValueError('String found before any variable name: '
+                                     + token)
+                continue
+            values.append(token)
+            continue
+
+        if first.isalpha():
+
+            unit = _UNITS.get(token.lower())
+            if unit is not None:
+                if name is None or not values:
+                    if not lenient:
+                        raise ValueError('Unit found without value: ' + token)
+                    continue
+                values.append(unit)
+                continue
+
+            if _is_name(token):
+                if name is not None:
+                    if values:
+                        variables[name] = _make_value(name, values)
+                    elif not lenient:
+                        raise ValueError('No value found for variable ' + name)
+                name = token
+                values = list()
+                continue
+
+        if name is None:
+            if not lenient:
+                raise ValueError('Value found before any variable name: '
+                                 + token)
+            continue
+
+        try:
+            values.extend(converted[token])
+        except KeyError:
+            try:
+                converted[token] = _convert_token(token)
+            except (ValueError, ZeroDivisionError, OverflowError):
+                if not lenient:
+                    raise ValueError('Could not interpret the value of {}: {}'
+                                     .format(name, token))
+                continue
+            values.extend(converted[token])
+
+    if name is not None:
+        if values:
+            variables[name] = _make_value(name, values)
+        elif not lenient:
+            raise ValueError('No value found for variable ' + name)
+
+    return variables
+
+
+def parse_file(fname, lenient=False):
+    """
+    Read an abinit input file, and return the variables in an OrderedDict.
+    See parse_variables.
+    """
+    with open(fname, 'r') as f:
+        return parse_variables(f.read(), lenient=lenient)
@@ -77,7 +77,7 @@ input_variable_blocks = OrderedDict((
 ('Parallelisation', '''
     gwpara localrdwf ngroup_rf npband npfft
     npimage   npkpt   npspinor nppert
-    autoparal paral_kgb paral_rf use_gpu_cuda
+    autoparal max_ncpus paral_kgb paral_rf use_gpu_cuda
     '''),
 ('Unit cell', '''
     acell angdeg rprim ntypat znucl natom typat xred xcart
@@ -97,3 +97,11 @@ input_variable_blocks = OrderedDict((
     '''),
 ))
 
+
+# Section of each variable, indexed by name.
+# A variable that appears in several sections belongs to the first one.
+input_variable_sections = dict()
+for _section, _register in input_variable_blocks.items():
+    for _name in _register.split():
+        input_variable_sections.setdefault(_name, _section)
+del _section, _register, _name
@@ -1,5 +1,4 @@
 from __future__ import print_function, division
-import numpy as np
 
 from ..utils.units import angstrom_to_bohr
 
@@ -8,7 +7,13 @@ from ..utils.units import angstrom_to_bohr
 __all__ = ['structure_to_abivars']
 
 def structure_to_abivars(structure):
-    """Get abinit variables from a pymatgen.Structure object."""
+    """
+    Get abinit variables from a pymatgen.Structure object,
+    or from the name of a structure file readable by pymatgen.
+    """
+    if isinstance(structure, str):
+        from pymatgen import Structure
+        structure = Structure.from_file(structure)
 
     rprim = structure.lattice.matrix * angstrom_to_bohr
 
@@ -35,7 +40,7 @@ def structure_to_abivars(structure):
 
     d = dict(
         rprim=rprim.tolist(),
-        acell=np.ones(3, dtype=float).tolist(),
+        acell=[1.0, 1.0, 1.0],
         natom=natom,
         ntypat=ntypat,
         znucl=znucl,
@@ -0,0 +1,120 @@
+from __future__ import print_function, division
+import re
+
+from ..utils import iter_last_lines
+
+__all__ = ['read_timing', 'parse_nproc', 'parse_cpu_wall', 'get_efficiency',
+           'aggregate_timings']
+
+
+# abinit: '+Overall time at end (sec) : cpu=     12.3  wall=     12.5'
+_OVERALL_RE = re.compile(r'^\+Overall time at end \(sec\) *: *'
+                         r'cpu= *(\S+) +wall= *(\S+)')
+
+# anaddb, mrgddb: '+Total cpu time      0.123  and wall time      0.131 sec'
+_TOTAL_RE = re.compile(r'^\+Total cpu time +(\S+) +and wall time +(\S+) sec')
+
+# Any line giving a pair of times, e.g.
+# '- Proc.   0 individual time (sec): cpu=      3.1  wall=      3.1'
+_CPU_WALL_RE = re.compile(r'cpu= *([-+.\dEeDd]+) +wall= *([-+.\dEeDd]+)')
+
+# abinit 7-8: '-   nproc =    4', abinit 9: '-   mpi_nproc: 4, omp_nthreads: -1'
+_NPROC_RE = re.compile(r'^- +(?:nproc *=|mpi_nproc:) *(\d+)')
+
+
+def _to_float(sval):
+    return float(sval.replace('D', 'E').replace('d', 'e'))
+
+
+def parse_cpu_wall(line):
+    """Return the (cpu, wall) times given in a line, or None."""
+    match = _CPU_WALL_RE.search(line)
+    if not match:
+        return None
+    try:
+        return tuple(_to_float(s) for s in match.groups())
+    except ValueError:
+        return None
+
+
+def parse_nproc(line):
+    """Return the number of MPI processes declared in a line, or None."""
+    match = _NPROC_RE.match(line)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def read_timing(fname, nlines=100):
+    """
+    Read the overall timing printed at the end of an output file
+    of abinit, anaddb or mrgddb. Only the last nlines are read.
+
+    Returns a dict with the entries
+
+        cpu_time : float
+            CPU time summed over the processes (sec).
+        wall_time : float
+            Wall-clock time (sec).
+
+    which is empty if the timing was not found, e.g. for an unfinished run.
+    """
+    for line in iter_last_lines(fname, nlines):
+        for regex in (_OVERALL_RE, _TOTAL_RE):
+            match = regex.match(line)
+            if match:
+                try:
+                    cpu, wall = (_to_float(s) for s in match.groups())
+                except ValueError:
+                    continue
+                return dict(cpu_time=cpu, wall_time=wall)
+    return dict()
+
+
+def get_efficiency(timing):
+    """
+    Return the parallel efficiency cpu_time / (nproc * wall_time)
+    of a timing dict, or None if one of these values is missing.
+    """
+    cpu = timing.get('cpu_time')
+    wall = timing.get('wall_time')
+    nproc = timing.get('nproc')
+    if cpu is None or not wall or not nproc:
+        return None
+    return cpu / (nproc * wall)
+
+
+def aggregate_timings(timings):
+    """
+    Sum the timings of several runs. Returns a dict with the entries
+
+        ntasks : int
+            Number of runs with a wall time.
+        cpu_time : float
+            Total CPU time (sec).
+        wall_time : float
+            Total wall-clock time, as if the runs were sequential (sec).
+        core_time : float
+            Total of nproc * wall_time, i.e. the allocated resources (sec).
+            Runs with an unknown nproc are counted as serial.
+        efficiency : float
+            Overall parallel efficiency, cpu_time / core_time.
+    """
+    ntasks = 0
+    cpu_time = wall_time = core_time = 0.
+    for timing in timings:
+        wall = timing.get('wall_time')
+        if wall is None:
+            continue
+        ntasks += 1
+        wall_time += wall
+        core_time += (timing.get('nproc') or 1) * wall
+        cpu_time += timing.get('cpu_time') or 0.
+
+    return dict(
+        ntasks=ntasks,
+        cpu_time=cpu_time,
+        wall_time=wall_time,
+        core_time=core_time,
+        efficiency=cpu_time / core_time if core_time else None,
+        )
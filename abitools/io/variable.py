@@ -2,12 +2,11 @@ from __future__ import print_function, division
 
 import string
 import warnings
-from ..utils import flatten, listify, is_number, is_iter
+from ..utils import flatten, listify, is_number, is_iter, is_ndarray
 
 from ..utils import angstrom_to_bohr, eV_to_Ha
 
-import numpy as np
-
+from . import arrayformat
 
 __all__ = ['InputVariable']
 
@@ -15,6 +14,14 @@ __all__ = ['InputVariable']
 _SPECIAL_DATASET_INDICES = (':', '+', '?')
 _DATASET_INDICES = ''.join(list(string.digits) + list(_SPECIAL_DATASET_INDICES))
 
+try:
+    _LETTERS = string.letters
+except AttributeError:  # Py3
+    _LETTERS = string.ascii_letters
+
+# Letters replacing the dataset indices for sorting purposes.
+_DATASET_SORTING_LETTERS = dict(zip(_DATASET_INDICES, _LETTERS))
+
 _INTERNAL_DATASET_INDICES = ('__s', '__i', '__a')
 _SPECIAL_CONVERSION = zip(_INTERNAL_DATASET_INDICES, _SPECIAL_DATASET_INDICES)
 
@@ -38,6 +45,7 @@ class InputVariable(object):
     hence allowing for pythonic names.
     """
     _name = ''
+    _sorting_name = None
     _units = ''
 
     def __init__(self, name, value, units='', decimals=0):
@@ -66,6 +74,7 @@ class InputVariable(object):
     def name(self, name):
         name = self.internal_to_declared(name)
         self._name = name
+        self._sorting_name = None
 
     @property
     def basename(self):
@@ -111,15 +120,11 @@ class InputVariable(object):
             #TODO Shouldn't do that
             floatdecimal = 0
     
-        if isinstance(value, np.ndarray):
-            n = 1
-            for i in np.shape(value):
-                n *= i
-            value = np.reshape(value, n)
-            value = list(value)
+        if is_ndarray(value):
+            value = value.ravel()
     
         # values in lists
-        if isinstance(value, (list, tuple)):
+        if isinstance(value, (list, tuple)) or is_ndarray(value):
     
             # Reshape a list of lists into a single list
             if all(isinstance(v, (list, tuple)) for v in value):
@@ -176,6 +181,12 @@ class InputVariable(object):
 
     def format_list2d(self, values, floatdecimal=0):
         """Format a list of lists."""
+
+        if values and (len(values) * len(values[0]) >=
+                       arrayformat.VECTORIZE_MIN_SIZE):
+            line = arrayformat.format_list2d(values, floatdecimal)
+            if line is not None:
+                return line
     
         lvals = flatten(values)
     
@@ -220,6 +231,11 @@ class InputVariable(object):
         Format a list of values into a string.
         The result might be spread among several lines.
         """
+
+        if len(values) >= arrayformat.VECTORIZE_MIN_SIZE:
+            line = arrayformat.format_list(values, valperline, floatdecimal)
+            if line is not None:
+                return line
     
         line = ''
     
@@ -341,17 +357,12 @@ class InputVariable(object):
 
     @property
     def sorting_name(self):
-        """Name for sorting purposes."""
-        try:
-            letters = string.letters
-        except AttributeError:  # Py3
-            letters = string.ascii_letters
-
-        dataset = self.dataset
-        for this, that in zip(_DATASET_INDICES, letters):
-            dataset = dataset.replace(this, that)
-
-        return self.basename + '_' + dataset
+        """Name for sorting purposes. Computed once per name."""
+        if self._sorting_name is None:
+            dataset = ''.join(_DATASET_SORTING_LETTERS.get(c, c)
+                              for c in self.dataset)
+            self._sorting_name = self.basename + '_' + dataset
+        return self._sorting_name
 
     def __gt__(self, other):
         return self.sorting_name > other.sorting_name
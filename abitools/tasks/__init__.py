@@ -1,5 +1,46 @@
-from .abinittask import *
-from .mrgddbtask import *
-from .mrgdvtask import *
-from .anaddbtask import *
-from .mrggkktask import *
+"""
+The modules of abitools.tasks are imported on first use,
+so that importing a task does not import the other ones,
+nor the workflow machinery needed by MrgGkkFlow.
+"""
+import sys
+import importlib
+
+# Objects exported by the package, and the module defining them.
+_exports = {
+    'abinittask': ['AbinitTask'],
+    'mrgddbtask': ['MrgddbTask', 'MrgddbInput'],
+    'mrgdvtask': ['MrgdvTask', 'MrgdvInput'],
+    'anaddbtask': ['AnaddbTask'],
+    'mrggkktask': ['MrgGkkTask', 'MrgGkkFlow'],
+    }
+
+_origins = dict((name, module) for module, names in _exports.items()
+                for name in names)
+
+__all__ = sorted(_origins)
+
+
+def __getattr__(name):
+    if name in _origins:
+        module = importlib.import_module('.' + _origins[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    if name in _exports or name == 'abinitflow':
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError(
+        "module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_origins))
+
+
+# Module-level __getattr__ is only supported from Python 3.7.
+if sys.version_info < (3, 7):
+    from .abinittask import *
+    from .mrgddbtask import *
+    from .mrgdvtask import *
+    from .anaddbtask import *
+    from .mrggkktask import *
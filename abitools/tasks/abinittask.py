@@ -1,14 +1,17 @@
 from __future__ import print_function
 
 import os
+import re
 from os.path import join as pjoin
+import shutil
+import hashlib
 import warnings
 
-import numpy as np
-
-from ..utils import listify
-from ..core import MPITask, IOTask
-from ..io import AbinitInput
+from ..utils import listify, mkdir_p, iter_last_lines
+from ..core import MPITask, IOTask, write_if_changed, instrumented
+from ..io import AbinitInput, AbinitOutput
+from ..io.autoparal import (read_autoparal, select_configuration,
+                            AutoparalCache, is_parallel_variable)
 
 __all__ = ['AbinitTask']
 
@@ -22,6 +25,16 @@ class AbinitTask(MPITask, IOTask):
     _TASK_NAME = 'Abinit'
     _TAG_JOB_COMPLETED = 'Calculation completed'
 
+    # Cache of the autoparal dry runs shared by the tasks.
+    autoparal_cache = AutoparalCache()
+
+    # Data files from which a calculation can be restarted,
+    # in order of preference, and the variables reading them.
+    _RESTART_DATATYPES = ('WFK', 'DEN')
+    _RESTART_VARIABLES = dict(WFK='irdwfk', DEN='irdden')
+    _RESTART_FILE_RE = re.compile(
+        r'^(?:odat|tmp)(?:_DS(\d+))?_(WFK|DEN)(\.nc)?$')
+
     def __init__(self, dirname, rootname='calc', **kwargs):
         """
         Arguments
@@ -40,10 +53,14 @@ class AbinitTask(MPITask, IOTask):
             Path to the directory containing pseudopotential files.
         pseudos : list, str
             List of pseudopotential files.
-        structure : pymatgen.Structure
-            Structure object containing information on the unit cell.
+        structure : pymatgen.Structure or str
+            Structure object containing information on the unit cell,
+            or name of a structure file.
         input_variables : dict
             A dictionary of input variables for initialization.
+        input_template : AbinitInput
+            A frozen input providing the default variables,
+            shared among many tasks. See AbinitInput.freeze.
         bindir: str
             Path to the directory containing the abinit binaries.
 
@@ -55,7 +72,8 @@ class AbinitTask(MPITask, IOTask):
 
         self.rootname = rootname
 
-        self.input = AbinitInput(fname=self.input_basename)
+        self.input = AbinitInput(fname=self.input_basename,
+                                 template=kwargs.get('input_template'))
 
         self.pseudo_dir = kwargs.get('pseudo_dir', self.dirname)
         self.pseudos    = kwargs.get('pseudos', [])
@@ -152,6 +170,79 @@ class AbinitTask(MPITask, IOTask):
     def set_pseudos(self, value):
         self.pseudos = value
 
+    def get_output(self):
+        """Return an AbinitOutput object to read the main output file."""
+        return AbinitOutput(self.output_fname)
+
+    def get_results(self, dataset=None):
+        """
+        Return the results of a dataset, as extracted by
+        AbinitOutput.get_dataset_results, except for the history
+        of the SCF energies. Empty if the output file does not exist.
+
+        Keyword arguments
+        -----------------
+
+        dataset : int (None)
+            Index of the dataset. Default is the last dataset.
+
+        """
+        if not os.path.exists(self.output_fname):
+            return dict()
+
+        output = self.get_output()
+        if dataset is None:
+            if not output.datasets:
+                return dict()
+            dataset = output.datasets[-1]
+
+        results = dict(output.get_dataset_results(dataset))
+        del results['etot_history']
+        return results
+
+    def get_timing(self):
+        """
+        Return the timing of the run, with the overall and per-dataset
+        cpu and wall times and the number of processes actually used,
+        as extracted by AbinitOutput.get_timing.
+        Empty if the output file does not exist.
+        """
+        if not os.path.exists(self.output_fname):
+            return dict()
+        return self.get_output().get_timing()
+
+    def get_content_string(self):
+        """
+        Return a string that identifies the calculation together with
+        the content of the pseudopotentials and linked files.
+        Includes the names of the files, but not the pseudopotential paths.
+        """
+        content = super(AbinitTask, self).get_content_string()
+        if content is None:
+            return None
+
+        lines = [content, self.input_basename, self.output_basename]
+        for path in (self.idat_root, self.odat_root, self.tmp_root):
+            lines.append(os.path.relpath(path, self.dirname))
+
+        return '\n'.join(lines)
+
+    def get_content_files(self):
+        files = super(AbinitTask, self).get_content_files()
+        for i, pseudo in enumerate(self.pseudos):
+            files.append(('pseudo{}'.format(i+1),
+                          pjoin(self.pseudo_dir, pseudo)))
+        return files
+
+    def get_output_paths(self):
+        paths = super(AbinitTask, self).get_output_paths()
+        paths.append(self.log_basename)
+        for dirpath, dirnames, filenames in os.walk(self.out_data_dir):
+            for filename in sorted(filenames):
+                paths.append(os.path.relpath(pjoin(dirpath, filename),
+                                             self.dirname))
+        return paths
+
     def get_odat(self, datatype, dtset=0):
         """
         Returns an output data file name.
@@ -242,6 +333,119 @@ class AbinitTask(MPITask, IOTask):
         dest = os.path.relpath(self.get_idat(datatype, idtset), self.dirname)
         self.update_link(target, dest)
 
+    def find_restart_file(self):
+        """
+        Return the last usable data file from which the calculation
+        can be restarted, as a tuple (fname, datatype, dtset),
+        or None if there is none. The output and temporary data
+        directories are searched for non-empty WFK and DEN files.
+        The file of the last dataset is used, and a WFK file is
+        preferred over a DEN file of the same dataset.
+        """
+        candidates = list()
+        for dirname in (self.out_data_dir, self.tmp_data_dir):
+            if not os.path.isdir(dirname):
+                continue
+            for basename in os.listdir(dirname):
+                match = self._RESTART_FILE_RE.match(basename)
+                if not match:
+                    continue
+                fname = pjoin(dirname, basename)
+                try:
+                    stat = os.stat(fname)
+                except OSError:
+                    continue
+                if not stat.st_size:
+                    continue
+                dtset = int(match.group(1) or 0)
+                datatype = match.group(2)
+                priority = -self._RESTART_DATATYPES.index(datatype)
+                candidates.append(((dtset, priority, stat.st_mtime),
+                                   (fname, datatype, dtset)))
+
+        if not candidates:
+            return None
+        return max(candidates)[1]
+
+    def archive_output(self):
+        """
+        Move the output and log files of the calculation into a new
+        directory 'restart_<n>' of the task, and return its name.
+        """
+        i = 1
+        while os.path.exists(pjoin(self.dirname, 'restart_{}'.format(i))):
+            i += 1
+        archive = pjoin(self.dirname, 'restart_{}'.format(i))
+        mkdir_p(archive)
+
+        for basename in (self.output_basename, self.log_basename,
+                         self.stderr_basename):
+            fname = pjoin(self.dirname, basename)
+            if os.path.exists(fname):
+                shutil.move(fname, pjoin(archive, basename))
+
+        return archive
+
+    def restart(self):
+        """
+        Prepare an unfinished calculation to be restarted from its
+        last usable WFK or DEN file (see find_restart_file),
+        so that the SCF cycle starts from the previous state.
+
+        The partial output is archived (see archive_output), together with
+        the data file, which is linked as input data, and irdwfk or irdden
+        is set in the input. The files of the task are written again.
+
+        For an input with several datasets, the variable is only set
+        for the dataset that produced the file (e.g. irdwfk2), and every
+        dataset is executed again, including the datasets before it,
+        which had completed.
+        Returns False if the task is not unfinished or cannot be restarted.
+        """
+        if self.get_status() != self._STATUS_UNFINISHED:
+            return False
+
+        restart_file = self.find_restart_file()
+        if restart_file is None:
+            return False
+        fname, datatype, dtset = restart_file
+
+        # The data file is moved away, so that it is not overwritten
+        # by the output of the restarted calculation while being read.
+        archive = self.archive_output()
+        target = pjoin(archive, os.path.basename(fname))
+        shutil.move(fname, target)
+
+        # Keep the extension of netcdf files, e.g. idat_WFK.nc
+        extension = os.path.splitext(fname)[1]
+        self.link_idat(target, datatype + extension, dtset)
+
+        name = self._RESTART_VARIABLES[datatype]
+        if dtset:
+            name += str(dtset)
+        self.input.set_variable(name, 1)
+
+        self.write()
+        return True
+
+    def run_if_incomplete(self, restart=False):
+        """
+        Run the task if it does not report a completed status.
+
+        Keyword arguments
+        -----------------
+
+        restart : bool (False)
+            Restart an unfinished calculation from its last
+            WFK or DEN file, if any. See restart.
+
+        """
+        if self.is_complete():
+            return
+        if restart:
+            self.restart()
+        self.run()
+
     def get_filesfile_content(self):
         S = ''
         S += self.input_basename + '\n'
@@ -255,23 +459,25 @@ class AbinitTask(MPITask, IOTask):
 
         return S
 
+    @instrumented('write')
     def write(self):
 
         # Main directory, etc...
-        super(AbinitTask, self).write()
+        summary = super(AbinitTask, self).write()
 
         self.check_pseudos()
 
         # Sub-directories
         for d in (self.input_data_dir, self.out_data_dir, self.tmp_data_dir):
-            if not os.path.exists(d):
-                os.mkdir(d)
+            mkdir_p(d)
 
-        with self.exec_from_dirname():
-            with open(self.filesfile_basename, 'w') as f:
-                f.write(self.get_filesfile_content())
+        fname = pjoin(self.dirname, self.filesfile_basename)
+        summary.add(fname,
+                    write_if_changed(fname, self.get_filesfile_content()))
 
-            self.input.write()
+        summary.add(self.input_fname, self.input.write(self.input_fname))
+
+        return summary
 
     def check_pseudos(self):
         """Check that pseudopotential files exist."""
@@ -287,7 +493,10 @@ class AbinitTask(MPITask, IOTask):
         self.input.set_comment(*args, **kwargs)
 
     def set_structure(self, *args, **kwargs):
-        """Set the structure using a pymatgen.Structure object."""
+        """
+        Set the structure using a pymatgen.Structure object,
+        or the name of a structure file.
+        """
         self.input.set_structure(*args, **kwargs)
 
     def set_variables(self, *args, **kwargs):
@@ -297,6 +506,209 @@ class AbinitTask(MPITask, IOTask):
     def set_bindir(self, path):
         self.runscript['ABINIT'] = os.path.join(path, 'abinit')
 
+    @property
+    def autoparal_dir(self):
+        """Directory of the autoparal dry run."""
+        return pjoin(self.dirname, 'autoparal')
+
+    def get_autoparal_input(self, max_ncpus):
+        """
+        Return the input of the autoparal dry run, i.e. the input
+        of the task without parallelization variables,
+        with autoparal and max_ncpus.
+        """
+        probe = self.input.copy(fname=self.input_basename)
+
+        for name in list(probe.variables):
+            if is_parallel_variable(name):
+                del probe.variables[name]
+
+        probe.set_variables(dict(autoparal=1, max_ncpus=int(max_ncpus)))
+        return probe
+
+    def get_autoparal_key(self, max_ncpus):
+        """
+        Return the key of the autoparal dry run in the cache,
+        a hash of its input and of the content of the pseudopotentials.
+        """
+        content = str(self.get_autoparal_input(max_ncpus))
+        sha = hashlib.sha1(content.encode('utf-8'))
+        for pseudo in self.pseudos:
+            with open(pjoin(self.pseudo_dir, pseudo), 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(block)
+        return sha.hexdigest()
+
+    def run_autoparal(self, max_ncpus, timeout=None):
+        """
+        Execute the autoparal dry run of abinit, serially,
+        in the directory autoparal_dir, and return the Autoparal
+        document parsed by io.autoparal.parse_autoparal.
+
+        Arguments
+        ---------
+
+        max_ncpus : int
+            Maximum number of cores of the suggested configurations.
+
+        Keyword arguments
+        -----------------
+
+        timeout : float (None)
+            Wall-clock time limit of the dry run, in seconds.
+            When it expires, abinit is killed and an exception is raised.
+
+        An exception, showing the end of the log, is raised if the dry run
+        fails or does not print the Autoparal document.
+        """
+        dirname = self.autoparal_dir
+        mkdir_p(dirname)
+        probe = self.get_autoparal_input(max_ncpus)
+        probe.write(pjoin(dirname, self.input_basename))
+
+        lines = [self.input_basename, self.output_basename,
+                 'probe_i', 'probe_o', 'probe_t']
+        lines.extend(pjoin(self.pseudo_dir, pseudo) for pseudo in self.pseudos)
+        write_if_changed(pjoin(dirname, self.filesfile_basename),
+                         '\n'.join(lines) + '\n')
+
+        # Remove the output of a previous run, which abinit would not
+        # overwrite.
+        fname = pjoin(dirname, self.output_basename)
+        if os.path.exists(fname):
+            os.remove(fname)
+
+        log_fname = pjoin(dirname, self.log_basename)
+        returncode, expired = self._call_autoparal(dirname, log_fname, timeout)
+
+        if expired:
+            self._raise_autoparal_error(
+                'The autoparal dry run timed out after {} s'.format(timeout),
+                log_fname)
+
+        # A complete document is used even if abinit exited with an error
+        # after printing it.
+        for fname in (log_fname, pjoin(dirname, self.output_basename)):
+            if os.path.exists(fname):
+                document = read_autoparal(fname)
+                if document is not None:
+                    return document
+
+        if returncode:
+            self._raise_autoparal_error(
+                'The autoparal dry run failed with exit code {}'.format(
+                    returncode), log_fname)
+
+        self._raise_autoparal_error(
+            'No autoparal section found in the dry run', log_fname)
+
+    def _call_autoparal(self, dirname, log_fname, timeout=None):
+        """
+        Execute abinit in dirname, and return its exit code,
+        and whether it was killed because the timeout expired.
+        """
+        import subprocess
+        import threading
+
+        expired = list()
+        with open(pjoin(dirname, self.filesfile_basename), 'r') as stdin:
+            with open(log_fname, 'w') as stdout:
+                process = subprocess.Popen(
+                    [self.runscript['ABINIT']], cwd=dirname, stdin=stdin,
+                    stdout=stdout, stderr=subprocess.STDOUT)
+
+                def kill():
+                    expired.append(True)
+                    try:
+                        process.kill()
+                    except OSError:
+                        pass
+
+                timer = None
+                if timeout is not None:
+                    timer = threading.Timer(timeout, kill)
+                    timer.start()
+                try:
+                    returncode = process.wait()
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+
+        return returncode, bool(expired)
+
+    @staticmethod
+    def _raise_autoparal_error(message, log_fname, nlines=20):
+        """Raise an exception with the last lines of the log."""
+        lines = list()
+        if os.path.exists(log_fname):
+            lines = list(iter_last_lines(log_fname, nlines))[::-1]
+        raise Exception('{}:\n{}\n\n'.format(message, log_fname) +
+                        '\n'.join(lines))
+
+    def set_autoparal(self, max_ncpus, min_efficiency=.7, cache=None,
+                      timeout=None):
+        """
+        Set the MPI layout of the task from an autoparal dry run of abinit.
+        Among the suggested configurations using at most max_ncpus cores,
+        the one giving the largest speedup with an efficiency of at least
+        min_efficiency is applied: nproc is set to its number of MPI
+        processes, and the parallelization variables (npkpt, npband,
+        npfft, ...) are set in the input.
+        The dry run is cached per input, so that identical inputs
+        are probed only once. Returns the configuration applied.
+
+        Arguments
+        ---------
+
+        max_ncpus : int
+            Maximum number of cores used by the task.
+
+        Keyword arguments
+        -----------------
+
+        min_efficiency : float (.7)
+            Minimum parallel efficiency of the configuration.
+        cache : AutoparalCache or str (None)
+            Cache of the dry runs, or name of its file.
+            Default is the in-memory cache shared by all tasks,
+            AbinitTask.autoparal_cache.
+        timeout : float (None)
+            Wall-clock time limit of the dry run, in seconds.
+
+        """
+        if cache is None:
+            cache = self.autoparal_cache
+        elif not isinstance(cache, AutoparalCache):
+            cache = AutoparalCache(cache)
+
+        key = self.get_autoparal_key(max_ncpus)
+        document = cache.get(key)
+        if document is None:
+            document = self.run_autoparal(max_ncpus, timeout=timeout)
+            cache.set(key, document)
+            cache.flush()
+
+        configuration = select_configuration(
+            document['configurations'], max_ncpus=max_ncpus,
+            min_efficiency=min_efficiency)
+        if configuration is None:
+            raise Exception('No autoparal configuration found for ' +
+                            '{} cores in {}'.format(max_ncpus, self.dirname))
+
+        for name in list(self.input.variables):
+            if is_parallel_variable(name):
+                self.input.set_variable(name, None)
+        self.set_variables(configuration['vars'])
+
+        self.nproc = configuration.get('mpi_ncpus',
+                                       configuration.get('tot_ncpus'))
+        if configuration.get('omp_ncpus', 1) > 1:
+            self.runscript['OMP_NUM_THREADS'] = str(configuration['omp_ncpus'])
+        elif 'OMP_NUM_THREADS' in self.runscript.variables:
+            del self.runscript['OMP_NUM_THREADS']
+
+        return configuration
+
     @property
     def ndtset(self):
         return self.input.ndtset
@@ -4,11 +4,9 @@ import os
 from os.path import join as pjoin
 import warnings
 
-import numpy as np
-
 from ..utils import listify
-from ..core import MPITask, IOTask
-from ..io import AnaddbInput
+from ..core import MPITask, IOTask, write_if_changed, instrumented
+from ..io import AnaddbInput, read_timing, get_efficiency
 
 __all__ = ['AnaddbTask']
 
@@ -155,16 +153,40 @@ class AnaddbTask(MPITask, IOTask):
         S = '\n'.join(files) + '\n'
         return S
 
+    @instrumented('write')
     def write(self):
 
         # Main directory, etc...
-        super(AnaddbTask, self).write()
+        summary = super(AnaddbTask, self).write()
+
+        fname = pjoin(self.dirname, self.filesfile_basename)
+        summary.add(fname,
+                    write_if_changed(fname, self.get_filesfile_content()))
+
+        summary.add(self.input_fname, self.input.write(self.input_fname))
 
-        with self.exec_from_dirname():
-            with open(self.filesfile_basename, 'w') as f:
-                f.write(self.get_filesfile_content())
+        return summary
 
-            self.input.write()
+    def get_timing(self):
+        """
+        Return the cpu and wall times printed at the end of the output,
+        or of the log if they are not found in the output.
+        The number of processes is not reported by anaddb,
+        so nproc and efficiency are None.
+        Empty if the output file does not exist.
+        """
+        if not os.path.exists(self.output_fname):
+            return dict()
+        timing = dict(cpu_time=None, wall_time=None, nproc=None)
+        for fname in (self.output_fname,
+                      pjoin(self.dirname, self.log_basename)):
+            if os.path.exists(fname):
+                times = read_timing(fname)
+                if times:
+                    timing.update(times)
+                    break
+        timing['efficiency'] = get_efficiency(timing)
+        return timing
 
     def set_comment(self, *args, **kwargs):
         """Set a comment in the input file."""
@@ -4,7 +4,9 @@ import os
 from os.path import relpath
 import warnings
 
-from ..core import Writable
+from ..utils import mkdir_p
+from ..core import Writable, instrumented
+from ..io import read_timing, get_efficiency
 from .abinittask import AbinitTask
 
 __all__ = ['MrgddbTask', 'MrgddbInput']
@@ -17,6 +19,9 @@ class MrgddbTask(AbinitTask):
     _TASK_NAME = 'Mrgddb'
     _TAG_JOB_COMPLETED = 'the run completed successfully'
 
+    # Whether the output ddb is a link to the single input ddb.
+    _single_file = False
+
     def __init__(self, dirname, ddb_fnames, rootname='mrgddb', **kwargs):
         """
         Arguments
@@ -71,33 +76,57 @@ class MrgddbTask(AbinitTask):
         self.runscript.main = []
         self.update_link(self.ddb_fnames[0],
                          os.path.relpath(self.ddb_fname, self.dirname))
-        self.get_status = self.report_completed_if_ddb_exists
+        self._single_file = True
+
+    @instrumented('get_status')
+    def get_status(self, check_time=False):
+        if self._single_file:
+            return self.report_completed_if_ddb_exists(check_time)
+        return super(MrgddbTask, self).get_status(check_time)
 
-    def report_completed_if_ddb_exists(self):
+    def report_completed_if_ddb_exists(self, check_time=False):
         if os.path.exists(self.ddb_fname):
             return self._STATUS_COMPLETED
         else:
             return self._STATUS_UNSTARTED
 
+    @instrumented('write')
     def write(self):
 
         if len(self.input.ddb_fnames) == 1:
             self.set_single_file()
 
         # Main directory, etc...
-        super(AbinitTask, self).write()
+        summary = super(AbinitTask, self).write()
 
         # Sub-directories
         for d in (self.out_data_dir,):
-            if not os.path.exists(d):
-                os.mkdir(d)
+            mkdir_p(d)
+
+        summary.add(self.input_fname, self.input.write(self.input_fname))
 
-        with self.exec_from_dirname():
-            self.input.write()
+        return summary
 
     def set_bindir(self, path):
         self.runscript['MRGDDB'] = os.path.join(path, 'mrgddb')
 
+    def get_timing(self):
+        """
+        Return the cpu and wall times printed at the end of the output.
+        mrgddb is a serial code, so nproc is 1.
+        """
+        if not os.path.exists(self.output_fname):
+            return dict()
+        timing = dict(cpu_time=None, wall_time=None, nproc=1)
+        timing.update(read_timing(self.output_fname))
+        timing['efficiency'] = get_efficiency(timing)
+        return timing
+
+    def get_input_paths(self):
+        paths = super(MrgddbTask, self).get_input_paths()
+        paths.extend(os.path.normpath(f) for f in self.ddb_fnames)
+        return paths
+
     @property
     def ddb_fname(self):
         return self.get_odat('DDB')
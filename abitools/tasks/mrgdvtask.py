@@ -4,7 +4,8 @@ import os
 from os.path import relpath
 import warnings
 
-from ..core import Writable
+from ..utils import mkdir_p
+from ..core import Writable, instrumented
 from .abinittask import AbinitTask
 
 __all__ = ['MrgdvTask', 'MrgdvInput']
@@ -51,6 +52,8 @@ class MrgdvTask(AbinitTask):
 
         self.rootname = rootname
 
+        self.pot_fnames = pot_fnames
+
         self.input = MrgdvInput(
             fname=self.input_basename,
             out_fname=relpath(self.dvdb_fname, self.dirname),
@@ -64,22 +67,28 @@ class MrgdvTask(AbinitTask):
 
         self.nproc = 1
 
+    @instrumented('write')
     def write(self):
 
         # Main directory, etc...
-        super(AbinitTask, self).write()
+        summary = super(AbinitTask, self).write()
 
         # Sub-directories
         for d in (self.out_data_dir,):
-            if not os.path.exists(d):
-                os.mkdir(d)
+            mkdir_p(d)
 
-        with self.exec_from_dirname():
-            self.input.write()
+        summary.add(self.input_fname, self.input.write(self.input_fname))
+
+        return summary
 
     def set_bindir(self, path):
         self.runscript['MRGDV'] = os.path.join(path, 'mrgdv')
 
+    def get_input_paths(self):
+        paths = super(MrgdvTask, self).get_input_paths()
+        paths.extend(os.path.normpath(f) for f in self.pot_fnames)
+        return paths
+
     @property
     def dvdb_fname(self):
         return self.get_odat('DVDB')
@@ -18,7 +18,7 @@ class MrgGkkTask(Task):
         merge_gkk_nc(self.gkk_fnames, self.out_gkk_fname)
         return self.get_status()
 
-    def get_status(self):
+    def get_status(self, check_time=False):
         """
         Return the status of the task. Possible status are:
         Completed, Unstarted, Unfinished, Unknown.
@@ -28,6 +28,9 @@ class MrgGkkTask(Task):
         else:
             return self._STATUS_UNKNOWN
 
+    def get_input_paths(self):
+        return [os.path.normpath(f) for f in self.gkk_fnames]
+
     @property
     def gkk_fname(self):
         return self.out_gkk_fname
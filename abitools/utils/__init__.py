@@ -1,3 +1,5 @@
 from .formatting import *
 from .units import *
 from .various import *
+from .lazy import *
+from .jsonlines import *
@@ -1,6 +1,11 @@
 from __future__ import print_function, division
 
-import collections 
+import collections
+
+try:
+    from collections.abc import Iterable
+except ImportError:  # Py2
+    from collections import Iterable
 
 from copy import deepcopy
 
@@ -34,7 +39,7 @@ def flatten(iterable):
             iterator = stack.pop()
         else:
             if not isinstance(value, str) \
-               and isinstance(value, collections.Iterable):
+               and isinstance(value, Iterable):
                 stack.append(iterator)
                 iterator = iter(value)
             else:
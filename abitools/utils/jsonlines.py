@@ -0,0 +1,119 @@
+from __future__ import print_function
+import os
+import json
+import threading
+
+__all__ = ['JSONLinesIndex']
+
+
+class JSONLinesIndex(object):
+    """
+    Entries recorded in a JSON-lines file, one entry per line,
+    in which the last entry for a given key prevails.
+
+    New entries are appended to the file when it is flushed.
+    The file is rewritten with the live entries only, when loaded
+    or flushed, if it holds more outdated entries than live ones.
+    Without file, the entries are only kept in memory.
+
+    Subclasses define _get_entry_key, which returns the key of an entry.
+    """
+
+    def __init__(self, fname=None):
+        """
+        Keyword arguments
+        -----------------
+
+        fname : str (None)
+            Name of the file. Created at the first flush if needed.
+
+        """
+        self.fname = fname
+        self._entries = dict()
+        self._new_entries = list()
+        self._nlines = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def _get_entry_key(self, entry):
+        """
+        Return the key of an entry. Raises KeyError, TypeError
+        or ValueError if the entry is not valid.
+        """
+        raise NotImplementedError
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _is_bloated(self):
+        return self._nlines > 2 * len(self._entries)
+
+    def _rewrite(self):
+        """Rewrite the file with the live entries. Requires the lock."""
+        tmpname = self.fname + '.tmp'
+        with open(tmpname, 'w') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry) + '\n')
+        os.rename(tmpname, self.fname)
+        self._nlines = len(self._entries)
+        self._new_entries = list()
+
+    def load(self):
+        """Read the file, and compact it if needed."""
+        with self._lock:
+            self._entries.clear()
+            self._nlines = 0
+
+            if not self.fname or not os.path.exists(self.fname):
+                return
+
+            with open(self.fname, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        key = self._get_entry_key(entry)
+                    except (ValueError, KeyError, TypeError):
+                        # Ignore truncated lines from an interrupted flush.
+                        continue
+                    self._entries[key] = entry
+                    self._nlines += 1
+
+            if self._is_bloated() and not self._new_entries:
+                self._rewrite()
+
+    def _get_entry(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def _add_entry(self, entry):
+        with self._lock:
+            self._entries[self._get_entry_key(entry)] = entry
+            self._new_entries.append(entry)
+
+    def flush(self):
+        """Write the new entries to the file."""
+        with self._lock:
+            if not self.fname or not self._new_entries:
+                return
+
+            self._nlines += len(self._new_entries)
+            if self._is_bloated():
+                self._rewrite()
+                return
+
+            with open(self.fname, 'a') as f:
+                for entry in self._new_entries:
+                    f.write(json.dumps(entry) + '\n')
+            self._new_entries = list()
+
+    def clear(self):
+        """Remove all entries and the file."""
+        with self._lock:
+            self._entries.clear()
+            self._new_entries = list()
+            self._nlines = 0
+            if self.fname and os.path.exists(self.fname):
+                os.remove(self.fname)
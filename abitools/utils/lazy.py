@@ -0,0 +1,57 @@
+import sys
+import importlib
+
+__all__ = ['lazy_import', 'is_ndarray']
+
+
+class LazyModule(object):
+    """
+    A module that is only imported when one of its attributes is accessed.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if self.__dict__['_module'] is None:
+            return "<lazy module '{}'>".format(self.__dict__['_name'])
+        return repr(self.__dict__['_module'])
+
+
+def lazy_import(name):
+    """
+    Return a module that is only imported on first use.
+
+    >> np = lazy_import('numpy')
+    >> np.zeros(3)  # numpy is imported here.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_ndarray(obj):
+    """
+    Return True if the argument is a numpy array,
+    without importing numpy if it has not been imported yet.
+    """
+    numpy = sys.modules.get('numpy')
+    return numpy is not None and isinstance(obj, numpy.ndarray)
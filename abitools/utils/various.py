@@ -1,4 +1,5 @@
 import os
+import errno
 import contextlib
 
 @contextlib.contextmanager
@@ -10,20 +11,75 @@ def exec_from_dir(dirname):
     finally:
         os.chdir(original)
 
+def mkdir_p(dirname):
+    """Create a directory and its parents, if they do not exist."""
+    try:
+        os.makedirs(dirname)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(dirname):
+            raise
+
+def iter_last_lines(fname, nlines=None, blocksize=8192, start=0, end=None):
+    """
+    Iterate over the lines of fname, starting from the last one.
+
+    The file is read backward by blocks of blocksize bytes,
+    so that only the tail of the file is ever read,
+    and the memory usage does not depend on the file size.
+
+    Keyword arguments
+    -----------------
+
+    nlines : int (None)
+        Maximum number of lines to be returned. If None, read the whole file.
+    blocksize : int (8192)
+        Number of bytes read at a time.
+    start : int (0)
+        Byte offset at which the lines are considered to start.
+    end : int (None)
+        Byte offset at which the lines are considered to end.
+        If None, the end of the file.
+
+    """
+    if nlines is not None and int(nlines) <= 0:
+        return
+
+    with open(fname, 'rb') as f:
+
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        if end is not None:
+            position = min(position, end)
+        if position <= start:
+            return
+
+        # A trailing newline does not start a new line.
+        f.seek(position - 1)
+        if f.read(1) == b'\n':
+            position -= 1
+
+        count = 0
+        remainder = b''
+        while position > start:
+            size = min(blocksize, position - start)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + remainder).split(b'\n')
+
+            # The first piece might be an incomplete line.
+            remainder = lines.pop(0)
+
+            for line in reversed(lines):
+                yield line.decode('utf-8', 'replace')
+                count += 1
+                if nlines is not None and count >= nlines:
+                    return
+
+        yield remainder.decode('utf-8', 'replace')
+
 def last_lines_contain(fname, tag, nlines=60):
     """True if the last nlines of fname contain tag."""
-    nlines = int(nlines)
-    with open(fname, 'r') as f:
-        lines = f.readlines()
-        lines.reverse()
-
-        for i in range(nlines):
-            try:
-                line = lines[i]
-            except:
-                return False
-
-            if tag in line:
-                return True
+    for line in iter_last_lines(fname, nlines):
+        if tag in line:
+            return True
     return False
-
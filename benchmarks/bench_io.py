@@ -0,0 +1,114 @@
+"""Benchmarks of the input generation."""
+from __future__ import print_function
+
+import numpy as np
+
+from abitools.io import AbinitInput
+from abitools.io.variable import InputVariable
+from abitools.io.abinitinput import SortedVariableBlock
+from abitools.io.sorting import input_variable_sections
+from abitools.io.structures import structure_to_abivars
+
+from .common import FakeStructure
+
+
+class InputVariableSuite(object):
+    """Formatting of large array variables."""
+
+    params = [100, 10000, 100000]
+    param_names = ['size']
+
+    def setup(self, size):
+        rng = np.random.RandomState(0)
+        self.floats = (rng.rand(size) * 10).round(6).tolist()
+        self.ints = rng.randint(0, 1000, size).tolist()
+        self.xred = rng.rand(size // 3 + 1, 3).round(10).tolist()
+
+    def time_floats(self, size):
+        str(InputVariable('occ', self.floats))
+
+    def time_ints(self, size):
+        str(InputVariable('typat', self.ints))
+
+    def time_list2d(self, size):
+        str(InputVariable('xred', self.xred))
+
+
+class AbinitInputSuite(object):
+    """Rendering of inputs with many datasets."""
+
+    params = [10, 100, 1000]
+    param_names = ['ndtset']
+
+    def setup(self, ndtset):
+        self.input = AbinitInput()
+        self.input.ndtset = ndtset
+        self.input.set_variables({
+            'ecut': 20., 'ecutsm': .5, 'nstep': 50, 'diemac': 9.,
+            'acell': 3 * [10.26], 'ntypat': 1, 'znucl': 14, 'natom': 2,
+            'typat': [1, 1], 'xred': [[0., 0., 0.], [.25, .25, .25]],
+            'rprim': [[0., .5, .5], [.5, 0., .5], [.5, .5, 0.]],
+            })
+        for i in range(1, ndtset + 1):
+            self.input.set_variables({
+                'ngkpt': 3 * [i % 8 + 1], 'kptopt': 1, 'nshiftk': 1,
+                'shiftk': [0., 0., 0.], 'tolvrs': 1e-10, 'nband': 8 + i % 4,
+                }, dataset=i)
+
+    def time_str(self, ndtset):
+        str(self.input)
+
+
+class TemplateSuite(object):
+    """Creation and rendering of inputs derived from a template."""
+
+    params = [1000, 10000]
+    param_names = ['npoints']
+
+    def setup(self, npoints):
+        self.template = AbinitInput()
+        self.template.set_structure(FakeStructure(ncell=2))
+        self.template.set_variables({'ecut': 20., 'nstep': 50, 'tolvrs': 1e-10})
+        self.template.freeze()
+
+    def time_sweep(self, npoints):
+        for i in range(npoints):
+            f = AbinitInput(template=self.template)
+            f.set_variable('ecut', 10. + i)
+            str(f)
+
+
+class SortedVariableBlockSuite(object):
+    """Bucketing of variables into sections."""
+
+    params = [1000, 100000]
+    param_names = ['nvariables']
+
+    def setup(self, nvariables):
+        names = sorted(input_variable_sections) + ['unknown_variable']
+        self.variables = [
+            InputVariable(names[i % len(names)] + str(i // len(names) + 1), 1)
+            for i in range(nvariables)]
+
+    def time_get_section_blocks(self, nvariables):
+        block = SortedVariableBlock('Common variables')
+        block.extend(self.variables)
+        block.get_section_blocks()
+
+
+class StructureSuite(object):
+    """Conversion of large supercells into abinit variables."""
+
+    params = [5, 10, 20]
+    param_names = ['ncell']
+
+    def setup(self, ncell):
+        self.structure = FakeStructure(ncell)
+
+    def time_structure_to_abivars(self, ncell):
+        structure_to_abivars(self.structure)
+
+    def time_set_structure_and_str(self, ncell):
+        f = AbinitInput()
+        f.set_structure(self.structure)
+        str(f)
@@ -0,0 +1,85 @@
+"""Benchmarks of the workflow generation and of the status scanning."""
+from __future__ import print_function
+import os
+
+from abitools.utils import last_lines_contain
+
+from .common import (make_workflow, write_fake_outputs, make_sparse_file,
+                     TemporaryDirectory)
+
+
+class WorkflowWriteSuite(object):
+    """Writing a large workflow into an empty or an up-to-date tree."""
+
+    params = [['new', 'unchanged'], [1, 8]]
+    param_names = ['tree', 'nthreads']
+    ntasks = 10000
+
+    number = 1
+    repeat = 3
+    timeout = 600
+
+    def setup(self, tree, nthreads):
+        self.tmpdir = TemporaryDirectory()
+        self.workflow = make_workflow(os.path.join(self.tmpdir.name, 'flow'),
+                                      self.ntasks)
+        if tree == 'unchanged':
+            self.workflow.write()
+
+    def teardown(self, tree, nthreads):
+        self.tmpdir.cleanup()
+
+    def time_write(self, tree, nthreads):
+        self.workflow.write(nthreads=nthreads)
+
+
+class WorkflowStatusSuite(object):
+    """Status of a large workflow whose outputs exist."""
+
+    ntasks = 10000
+
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    def setup(self):
+        self.tmpdir = TemporaryDirectory()
+        self.workflow = make_workflow(os.path.join(self.tmpdir.name, 'flow'),
+                                      self.ntasks)
+        self.workflow.write()
+        write_fake_outputs(self.workflow)
+
+    def teardown(self):
+        self.tmpdir.cleanup()
+
+    def time_get_status(self):
+        for task in self.workflow.tasks:
+            task.get_status()
+
+    def time_scan_status(self):
+        self.workflow.scan_status()
+
+    def time_scan_status_threaded(self):
+        self.workflow.scan_status(nthreads=8)
+
+
+class LastLinesSuite(object):
+    """Completion check at the end of multi-GB output files."""
+
+    params = [2 ** 30, 2 ** 33]
+    param_names = ['size']
+
+    def setup(self, size):
+        self.tmpdir = TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, 'calc.out')
+        tail = b''.join(b' iter %4d  etot= -8.87213\n' % i for i in range(200))
+        make_sparse_file(self.fname, size, tail + b'\n Calculation completed.\n')
+
+    def teardown(self, size):
+        self.tmpdir.cleanup()
+
+    def time_completed(self, size):
+        last_lines_contain(self.fname, 'Calculation completed')
+
+    def time_not_found(self, size):
+        last_lines_contain(self.fname, 'Calculation aborted')
@@ -0,0 +1,88 @@
+"""Synthetic workloads shared by the benchmarks."""
+from __future__ import print_function
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from abitools import AbinitTask, Workflow
+
+__all__ = ['FakeStructure', 'make_workflow', 'write_fake_outputs',
+           'make_sparse_file', 'TemporaryDirectory']
+
+
+class FakeStructure(object):
+    """
+    Mimics the attributes of a pymatgen.Structure used by abitools,
+    for a cubic supercell of a two-species zincblende crystal.
+    """
+
+    class _Lattice(object):
+        def __init__(self, matrix):
+            self.matrix = matrix
+
+    class _Site(object):
+        def __init__(self, frac_coords):
+            self.frac_coords = frac_coords
+
+    def __init__(self, ncell=10, acell=5.43):
+        basis = np.array([[0., 0., 0.], [.25, .25, .25]])
+        fcc = np.array([[0., 0., 0.], [0., .5, .5], [.5, 0., .5], [.5, .5, 0.]])
+        grid = np.indices((ncell,) * 3).reshape(3, -1).T
+
+        cell = (fcc[:, None, :] + basis[None, :, :]).reshape(-1, 3)
+        xred = (grid[:, None, :] + cell[None, :, :]).reshape(-1, 3) / ncell
+
+        self.lattice = self._Lattice(np.eye(3) * acell * ncell)
+        self.sites = [self._Site(x) for x in xred]
+        self.num_sites = len(self.sites)
+        self.ntypesp = 2
+        self.atomic_numbers = [14, 6] * (self.num_sites // 2)
+
+
+def make_workflow(dirname, ntasks, template=None):
+    """Return a workflow of ntasks AbinitTasks in sub-directories."""
+    workflow = Workflow(dirname=dirname)
+    for i in range(ntasks):
+        task = AbinitTask(os.path.join(dirname, 'task{:05d}'.format(i)),
+                          input_template=template)
+        task.set_variables({'ecut': 10. + i % 40, 'ngkpt': [4, 4, 4]})
+        workflow.add_task(task)
+    return workflow
+
+
+def write_fake_outputs(workflow, fraction_completed=.9, nlines=2000):
+    """
+    Write output files for the tasks of a workflow, a fraction of which
+    end with the completion tag, while the others were interrupted.
+    """
+    body = ''.join(' iter {:4d}  etot= -8.8721{:08d}\n'.format(i, i)
+                   for i in range(nlines))
+    ncompleted = int(len(workflow.tasks) * fraction_completed)
+    for i, task in enumerate(workflow.tasks):
+        with open(task.output_fname, 'w') as f:
+            f.write(body)
+            if i < ncompleted:
+                f.write('\n Calculation completed.\n')
+
+
+def make_sparse_file(fname, size, tail):
+    """
+    Create a file of the given size in bytes ending with tail.
+    The beginning of the file is sparse, so that creating it is cheap.
+    """
+    with open(fname, 'wb') as f:
+        f.truncate(size - len(tail))
+        f.seek(size - len(tail))
+        f.write(tail)
+
+
+class TemporaryDirectory(object):
+    """A temporary directory removed by cleanup()."""
+
+    def __init__(self):
+        self.name = tempfile.mkdtemp(prefix='abitools-bench-')
+
+    def cleanup(self):
+        shutil.rmtree(self.name, ignore_errors=True)
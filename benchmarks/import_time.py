@@ -0,0 +1,90 @@
+"""
+Measure the import time of abitools and check it against a budget.
+
+Each statement is executed in fresh interpreters with `python -X importtime`,
+and the median of the cumulative import time of abitools is reported.
+The script exits with a non-zero status if a budget is exceeded,
+or if a heavy dependency is imported by a statement.
+
+Usage:
+
+    python benchmarks/import_time.py [--repeat N]
+"""
+from __future__ import print_function
+import os
+import sys
+import subprocess
+import argparse
+
+# Statement, budget in milliseconds, modules that must not be imported.
+BUDGETS = [
+    ('import abitools', 20., ('numpy', 'pymatgen', 'abitools.core')),
+    ('from abitools import AbinitTask', 100., ('numpy', 'pymatgen')),
+    ('from abitools import Workflow', 100., ('numpy', 'pymatgen')),
+    ]
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(statement, forbidden=()):
+    """
+    Execute a statement in a new interpreter and return
+    the cumulative import time of the abitools modules in ms,
+    and the forbidden modules that were imported.
+    """
+    check = '; import sys; print([m for m in {!r} if m in sys.modules])'
+    code = statement + check.format(list(forbidden))
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    out, err = process.communicate()
+    if process.returncode:
+        raise RuntimeError('Could not execute {!r}:\n{}'.format(statement, err))
+
+    total = 0
+    for line in err.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative, name = line.split(':', 1)[1].split('|')
+        # The subpackages imported on first use are top-level entries.
+        toplevel = len(name) - len(name.lstrip()) == 1
+        if toplevel and name.strip().split('.')[0] == 'abitools':
+            total += int(cumulative)
+
+    imported = eval(out.strip().splitlines()[-1])
+    return total * 1e-3, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=7,
+                        help='Number of interpreters per statement.')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for statement, budget, forbidden in BUDGETS:
+        times = list()
+        imported = set()
+        for i in range(args.repeat):
+            t, modules = measure(statement, forbidden)
+            times.append(t)
+            imported.update(modules)
+        median = sorted(times)[len(times) // 2]
+
+        status = 'ok'
+        if median > budget:
+            status = 'OVER BUDGET'
+            failed = True
+        if imported:
+            status = 'IMPORTS ' + ', '.join(sorted(imported))
+            failed = True
+
+        print('{:<40} {:8.1f} ms  (budget {:5.0f} ms)  {}'.format(
+              statement, median, budget, status))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
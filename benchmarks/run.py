@@ -0,0 +1,191 @@
+"""
+Run the abitools benchmarks and track the results over time.
+
+The benchmarks follow the conventions of asv (airspeed velocity),
+and can be run with `asv run` from the repository root.
+This script is a lightweight runner that does not require asv:
+each result is appended to a history file, together with the git commit,
+and compared to the previous results obtained on the same machine.
+It exits with a non-zero status if a benchmark became slower
+than the previous result by more than the threshold.
+
+Usage:
+
+    python benchmarks/run.py [-b PATTERN] [--quick] [--no-save]
+"""
+from __future__ import print_function
+import os
+import re
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import itertools
+import importlib
+import subprocess
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MODULES = ('bench_io', 'bench_workflow')
+_DEFAULT_HISTORY = os.path.join(_ROOT, '.benchmarks', 'history.jsonl')
+
+
+def iter_benchmarks(pattern=None):
+    """
+    Iterate over (name, cls, method_name, params) for every benchmark
+    whose name matches the regular expression pattern.
+    """
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+
+    for modname in _MODULES:
+        module = importlib.import_module('benchmarks.' + modname)
+        for clsname, cls in sorted(vars(module).items()):
+            if not inspect.isclass(cls) or cls.__module__ != module.__name__:
+                continue
+
+            params = getattr(cls, 'params', [])
+            if params and not isinstance(params[0], (list, tuple)):
+                params = [params]
+
+            for method in sorted(vars(cls)):
+                if not method.startswith('time_'):
+                    continue
+                for combination in itertools.product(*params):
+                    name = '{}.{}.{}'.format(modname, clsname, method)
+                    if combination:
+                        name += '({})'.format(
+                            ', '.join(map(str, combination)))
+                    if pattern and not re.search(pattern, name):
+                        continue
+                    yield name, cls, method, combination
+
+
+def time_benchmark(cls, method, params, quick=False):
+    """
+    Return the minimum time per call over the repeats, in seconds.
+    setup and teardown are called around each repeat.
+    """
+    number = getattr(cls, 'number', 0)
+    repeat = 1 if quick else getattr(cls, 'repeat', 5)
+
+    best = None
+    for i in range(repeat):
+        instance = cls()
+        if hasattr(instance, 'setup'):
+            instance.setup(*params)
+        try:
+            function = getattr(instance, method)
+
+            # Calibrate the number of calls to last at least 0.1 s.
+            n = number or 1
+            while True:
+                start = time.perf_counter()
+                for j in range(n):
+                    function(*params)
+                elapsed = time.perf_counter() - start
+                if number or quick or elapsed >= .1:
+                    break
+                n *= 10
+        finally:
+            if hasattr(instance, 'teardown'):
+                instance.teardown(*params)
+
+        t = elapsed / n
+        if best is None or t < best:
+            best = t
+    return best
+
+
+def get_commit():
+    """Return the hash of the current git commit, or None."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=_ROOT,
+            stderr=subprocess.STDOUT, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_previous(history, machine):
+    """Return the latest result of every benchmark on this machine."""
+    previous = dict()
+    if not os.path.exists(history):
+        return previous
+    with open(history) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('machine') == machine:
+                previous.update(record['results'])
+    return previous
+
+
+def format_time(t):
+    for unit, factor in (('s', 1.), ('ms', 1e3), ('us', 1e6)):
+        if t * factor >= 1.:
+            return '{:8.3f} {:<2}'.format(t * factor, unit)
+    return '{:8.3f} ns'.format(t * 1e9)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('-b', '--bench', metavar='PATTERN',
+                        help='Only run the benchmarks matching a regex.')
+    parser.add_argument('--quick', action='store_true',
+                        help='Run each benchmark only once.')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Ratio to the previous result '
+                             'considered as a regression.')
+    parser.add_argument('--history', default=_DEFAULT_HISTORY,
+                        help='File in which the results are recorded.')
+    parser.add_argument('--no-save', dest='save', action='store_false',
+                        help='Do not record the results.')
+    args = parser.parse_args(argv)
+
+    machine = platform.node()
+    previous = load_previous(args.history, machine)
+
+    results = dict()
+    regressions = list()
+    for name, cls, method, params in iter_benchmarks(args.bench):
+        t = time_benchmark(cls, method, params, quick=args.quick)
+        results[name] = t
+
+        line = '{:<70} {}'.format(name, format_time(t))
+        if name in previous:
+            ratio = t / previous[name]
+            line += '  {:5.2f}x'.format(ratio)
+            if ratio > args.threshold:
+                line += '  REGRESSION'
+                regressions.append(name)
+        print(line)
+        sys.stdout.flush()
+
+    if args.save and results:
+        dirname = os.path.dirname(args.history)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        record = dict(
+            commit=get_commit(),
+            date=time.strftime('%Y-%m-%dT%H:%M:%S'),
+            machine=machine,
+            python=platform.python_version(),
+            quick=args.quick,
+            results=results,
+            )
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+
+    if regressions:
+        print('\n{} benchmark(s) slower than {}x the previous result.'.format(
+              len(regressions), args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import os
+import stat
+
+import pytest
+
+from abitools import AbinitTask
+
+# Stands in for abinit: reads the names of the input and output files
+# from the files file, records the directory in which it was executed,
+# and writes an output reporting a completed calculation.
+_FAKE_ABINIT = """#!/bin/bash
+read input
+read output
+echo "$PWD" >> "$(dirname "$0")/calls"
+echo " Calculation completed." > "$output"
+"""
+
+
+class FakeAbinit(object):
+
+    def __init__(self, bindir):
+        self.bindir = str(bindir)
+        self.executable = os.path.join(self.bindir, 'abinit')
+        with open(self.executable, 'w') as f:
+            f.write(_FAKE_ABINIT)
+        mode = os.stat(self.executable).st_mode
+        os.chmod(self.executable, mode | stat.S_IXUSR)
+
+        self.pseudo = os.path.join(self.bindir, 'Si.psp8')
+        with open(self.pseudo, 'w') as f:
+            f.write('pseudopotential\n')
+
+    @property
+    def calls(self):
+        """Directories in which abinit was executed."""
+        fname = os.path.join(self.bindir, 'calls')
+        if not os.path.exists(fname):
+            return list()
+        with open(fname) as f:
+            return [os.path.realpath(line.strip()) for line in f]
+
+    def make_task(self, dirname, **variables):
+        """Return an AbinitTask executed with the fake abinit."""
+        task = AbinitTask(str(dirname), bindir=self.bindir, mpirun='')
+        task.pseudo_dir = self.bindir
+        task.set_pseudos([os.path.basename(self.pseudo)])
+        task.set_variables(variables or dict(ecut=10.))
+        return task
+
+
+@pytest.fixture
+def abinit(tmp_path):
+    bindir = tmp_path / 'bin'
+    bindir.mkdir()
+    return FakeAbinit(bindir)
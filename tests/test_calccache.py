@@ -0,0 +1,73 @@
+import os
+
+from abitools import Workflow
+
+
+def make_workflow(abinit, dirname, ntasks):
+    workflow = Workflow(dirname=str(dirname))
+    for i in range(ntasks):
+        task = abinit.make_task(dirname / 't{}'.format(i), ecut=i + 1.)
+        workflow.add_task(task)
+    workflow.set_calculation_cache(str(dirname.parent / 'cache.json'))
+    workflow.write()
+    return workflow
+
+
+def test_run_restores_completed_tasks(abinit, tmp_path):
+    first = make_workflow(abinit, tmp_path / 'first', 2)
+    first.run()
+    assert len(abinit.calls) == 2
+    assert all(task.is_complete() for task in first)
+
+    second = make_workflow(abinit, tmp_path / 'second', 2)
+    second.run()
+    assert len(abinit.calls) == 2
+    for task in second:
+        assert task.is_complete()
+        assert os.path.isfile(task.output_fname)
+
+
+def test_partial_hit_runs_only_uncached_tasks(abinit, tmp_path):
+    make_workflow(abinit, tmp_path / 'first', 2).run()
+
+    second = make_workflow(abinit, tmp_path / 'second', 3)
+    second.run()
+    new_task = second.tasks[2]
+    assert abinit.calls[2:] == [os.path.realpath(new_task.dirname)]
+    assert all(task.is_complete() for task in second)
+
+
+def test_restored_outputs_are_copies(abinit, tmp_path):
+    first = make_workflow(abinit, tmp_path / 'first', 1)
+    first.run()
+    second = make_workflow(abinit, tmp_path / 'second', 1)
+    second.run()
+
+    source_task, task = first.tasks[0], second.tasks[0]
+    paths = [path for path in task.get_output_paths()
+             if os.path.exists(os.path.join(source_task.dirname, path))]
+    assert len(paths) > 1
+
+    for path in paths:
+        source = os.path.join(source_task.dirname, path)
+        restored = os.path.join(task.dirname, path)
+        assert not os.path.islink(restored)
+        assert not os.path.samefile(source, restored)
+
+        with open(source) as f:
+            content = f.read()
+        with open(restored, 'a') as f:
+            f.write('modified\n')
+        with open(source) as f:
+            assert f.read() == content
+
+
+def test_changed_input_is_not_restored(abinit, tmp_path):
+    make_workflow(abinit, tmp_path / 'first', 1).run()
+
+    workflow = Workflow(dirname=str(tmp_path / 'second'))
+    workflow.add_task(abinit.make_task(tmp_path / 'second' / 't0', ecut=20.))
+    workflow.set_calculation_cache(str(tmp_path / 'cache.json'))
+    workflow.write()
+    workflow.run()
+    assert len(abinit.calls) == 2
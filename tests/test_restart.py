@@ -0,0 +1,92 @@
+import os
+
+from abitools import Workflow
+
+
+def make_unfinished(task, *data_files):
+    """Write a task and fake an interrupted execution."""
+    task.write()
+    with open(task.output_fname, 'w') as f:
+        f.write(' ETOT  1  -8.8\n')
+    for fname in data_files:
+        with open(fname, 'w') as f:
+            f.write('data\n')
+    assert task.get_status() == task._STATUS_UNFINISHED
+
+
+def test_find_restart_file(abinit, tmp_path):
+    task = abinit.make_task(tmp_path / 'task')
+    make_unfinished(task,
+                    task.odat_root + '_DS1_WFK',
+                    task.odat_root + '_DS2_DEN',
+                    task.odat_root + '_DS2_WFK.nc')
+    open(task.odat_root + '_DS3_WFK', 'w').close()
+
+    fname, datatype, dtset = task.find_restart_file()
+    assert fname == task.odat_root + '_DS2_WFK.nc'
+    assert (datatype, dtset) == ('WFK', 2)
+
+
+def test_restart(abinit, tmp_path):
+    task = abinit.make_task(tmp_path / 'task')
+    make_unfinished(task, task.odat_root + '_DS2_WFK.nc')
+
+    assert task.restart()
+
+    archive = os.path.join(task.dirname, 'restart_1')
+    assert os.path.isfile(os.path.join(archive, task.output_basename))
+    assert os.path.isfile(os.path.join(archive, 'odat_DS2_WFK.nc'))
+    assert not os.path.exists(task.output_fname)
+    assert task.input.variables['irdwfk2'] == 1
+    assert 'irdwfk2' in open(task.input_fname).read()
+
+    task.run()
+    assert task.is_complete()
+    idat = task.get_idat('WFK.nc', 2)
+    assert os.path.islink(idat)
+    assert os.path.samefile(idat, os.path.join(archive, 'odat_DS2_WFK.nc'))
+
+
+def test_restart_requires_unfinished_task(abinit, tmp_path):
+    task = abinit.make_task(tmp_path / 'task')
+    task.write()
+    assert not task.restart()
+
+    make_unfinished(task)
+    assert not task.restart()
+    assert not os.path.exists(os.path.join(task.dirname, 'restart_1'))
+
+
+def test_run_if_incomplete(abinit, tmp_path):
+    task = abinit.make_task(tmp_path / 'task')
+    make_unfinished(task, task.odat_root + '_WFK')
+
+    task.run_if_incomplete()
+    assert task.is_complete()
+    assert not os.path.exists(os.path.join(task.dirname, 'restart_1'))
+    assert 'irdwfk' not in task.input.variables
+
+    task.run_if_incomplete(restart=True)
+    assert len(abinit.calls) == 1
+
+
+def test_workflow_restart_is_opt_in(abinit, tmp_path):
+    workflow = Workflow(dirname=str(tmp_path / 'flow'))
+    subflow = Workflow(dirname=str(tmp_path / 'flow' / 'sub'))
+    task = abinit.make_task(tmp_path / 'flow' / 'sub' / 'task')
+    subflow.add_task(task)
+    workflow.add_task(subflow)
+    workflow.write()
+
+    with open(os.devnull, 'w') as devnull:
+        make_unfinished(task, task.odat_root + '_WFK')
+        workflow.run_and_report_incomplete(file=devnull)
+        assert task.is_complete()
+        assert not os.path.exists(os.path.join(task.dirname, 'restart_1'))
+
+        make_unfinished(task, task.odat_root + '_WFK')
+        workflow.run_and_report_incomplete(file=devnull, restart=True)
+        assert task.is_complete()
+        assert task.input.variables['irdwfk'] == 1
+        assert os.path.isfile(
+            os.path.join(task.dirname, 'restart_1', 'odat_WFK'))
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from abitools import write_if_changed, WriteSummary
+
+
+def read(fname):
+    with open(fname) as f:
+        return f.read()
+
+
+def set_old_mtime(fname):
+    os.utime(fname, (1000000000, 1000000000))
+
+
+def test_created(tmp_path):
+    fname = str(tmp_path / 'file')
+    assert write_if_changed(fname, 'abc\n') == 'created'
+    assert read(fname) == 'abc\n'
+
+
+def test_unchanged_file_is_not_touched(tmp_path):
+    fname = str(tmp_path / 'file')
+    write_if_changed(fname, 'abc\n')
+    set_old_mtime(fname)
+    assert write_if_changed(fname, 'abc\n') == 'unchanged'
+    assert os.stat(fname).st_mtime == 1000000000
+
+
+@pytest.mark.parametrize('old, new', [
+    ('abc\ndef\n', 'abc\nxyz\n'),
+    ('abc\n', 'abc\ndef\n'),
+    ('abc\ndef\n', 'abc\n'),
+    ('abc\n', ''),
+    ('', 'abc\n'),
+    ])
+def test_updated(tmp_path, old, new):
+    fname = str(tmp_path / 'file')
+    write_if_changed(fname, old)
+    set_old_mtime(fname)
+    assert write_if_changed(fname, new) == 'updated'
+    assert read(fname) == new
+    assert os.stat(fname).st_mtime != 1000000000
+
+
+@pytest.mark.parametrize('chunks', [
+    ['abc\n', 'def\n', 'ghi\n'],
+    ['a', 'bc\nd', 'ef\ngh', 'i\n'],
+    ['abc\ndef\nghi\n'],
+    ])
+def test_streamed_content(tmp_path, chunks):
+    fname = str(tmp_path / 'file')
+    write_if_changed(fname, 'abc\ndef\nghi\n')
+
+    calls = list()
+
+    def render():
+        calls.append(1)
+        for chunk in chunks:
+            yield chunk
+
+    assert write_if_changed(fname, render) == 'unchanged'
+
+    modified = [chunk.replace('e', 'E') for chunk in chunks]
+    assert write_if_changed(fname, lambda: iter(modified)) == 'updated'
+    assert read(fname) == 'abc\ndEf\nghi\n'
+    assert len(calls) == 1
+
+
+def test_write_summary_keeps_most_significant_action():
+    summary = WriteSummary()
+    summary.add('a', 'unchanged')
+    summary.add('a', 'updated')
+    summary.add('a', 'unchanged')
+    summary.add('b', 'created')
+    assert summary.updated == ['a']
+    assert summary.created == ['b']
+    assert str(summary) == '1 created, 1 updated, 0 unchanged'
+
+
+def test_task_write_twice(abinit, tmp_path):
+    task = abinit.make_task(tmp_path / 'task')
+    summary = task.write()
+    assert summary.created and not summary.updated
+
+    summary = task.write()
+    assert not summary.created and not summary.updated
+
+    task.set_variables(dict(ecut=20.))
+    summary = task.write()
+    assert summary.updated == [task.input_fname]